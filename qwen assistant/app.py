@@ -2,16 +2,15 @@
 import speech_recognition as sr
 import pyttsx3
 import datetime
-import pywhatkit
 import webbrowser
 import os
 import requests
 import psutil
-from transformers import pipeline  # For Hugging Face models
-import wikipedia  # For dynamic context
 import threading
 import time
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import re
 import google.auth
 from googleapiclient.discovery import build
@@ -20,7 +19,22 @@ from google.auth.transport.requests import Request
 import pickle
 import base64
 from email.mime.text import MIMEText
+from urllib.parse import urlparse
 from google.oauth2.credentials import Credentials
+from models import registry  # Hugging Face pipelines, loaded on first use
+from batching import BatchScheduler
+from cache import StaleWhileRevalidateCache, SummaryCache, TTLCache
+from retrieval import WikipediaRetriever
+from speech import SpeechQueue
+from storage import data_path
+from telemetry import Telemetry
+from pipeline import CommandPipeline, StageMetrics
+from calendar_sync import CalendarStore
+from mail_sync import MailSync, sender_name
+from message_log import MessageLog
+from recognition import EnergyVAD, MicrophoneSource, StreamingListener, make_recognizer
+from reminders import ReminderScheduler
+from router import CITY, REST, SONG, TIME, ExampleClassifier, IntentRouter
 
 # Suppress TensorFlow warnings
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
@@ -33,40 +47,194 @@ warnings.filterwarnings("ignore", category=UserWarning, module="wikipedia")
 # Configure logging
 logging.basicConfig(filename="assistant.log", level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
+# Keep library chatter (COM type caches, TensorFlow/Keras, HTTP connection pools) out of assistant.log
+NOISY_LOGGERS = ("comtypes", "urllib3", "transformers", "tensorflow", "tf_keras", "absl", "h5py", "filelock",
+                 "huggingface_hub", "googleapiclient.discovery_cache")
+for _logger in NOISY_LOGGERS:
+    logging.getLogger(_logger).setLevel(logging.WARNING)
+os.environ.setdefault("TRANSFORMERS_VERBOSITY", "error")
+warnings.filterwarnings("ignore", module="tf_keras")
+
+# Telemetry (per-stage spans; summarize with `python telemetry.py report`)
+TELEMETRY_PATH = data_path("telemetry.jsonl")
+telemetry = Telemetry(TELEMETRY_PATH)
 
 # API Keys
 WEATHER_API_KEY = "******"  # Replace with your WeatherAPI key
 NEWS_API_KEY = "**********"  # Replace with your NewsAPI key
 BING_SEARCH_API_KEY = "***********"  # Replace with your Bing Search API key
+# API Endpoints (overridable so tests and load tests can point at local stubs)
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "http://api.weatherapi.com/v1")
+NEWS_API_URL = os.environ.get("NEWS_API_URL", "https://newsapi.org/v2")
+BING_SEARCH_URL = os.environ.get("BING_SEARCH_URL", "https://api.bing.microsoft.com/v7.0")
+WIKIPEDIA_API_URL = os.environ.get("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+HOME_CITY = "Hyderabad"  # Replace with your city; used for the morning briefing
+
+# HTTP Session (keeps connections to the weather, news and search APIs open between requests)
+class TracedSession(requests.Session):
+    """requests.Session that records a telemetry span with status and payload size for every call."""
+
+    def request(self, method, url, *args, **kwargs):
+        with telemetry.span("http", method=method, host=urlparse(url).netloc) as span:
+            response = super().request(method, url, *args, **kwargs)
+            span.set(status=response.status_code, bytes=len(response.content))
+        return response
+
+http = TracedSession()
+_http_adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+http.mount("https://", _http_adapter)
+http.mount("http://", _http_adapter)
+
+# Parallel Fetches
+io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="io")
+
+def run_parallel(tasks):
+    """Run independent fetches concurrently.
+
+    tasks maps a name to a zero-argument callable; the result maps each name to its return
+    value, or to None if it raised.
+    """
+    futures = {name: io_pool.submit(task) for name, task in tasks.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logging.error(f"Parallel Fetch Error ({name}): {e}")
+            results[name] = None
+    return results
+
+# Startup Settings
+STARTUP_BUDGET_SECONDS = 1.0  # Target time from process start until the assistant is ready
+WARM_UP_MODELS = True  # Load the Hugging Face models in the background after the greeting
+
+# Inference Settings
+MODEL_BACKENDS = {  # "fp32", "int8" or "onnx" per model (see models.py)
+    "sentiment": "int8",
+    "qa": "fp32",
+    "summarization": "fp32",
+}
+INFERENCE_THREADS = min(4, os.cpu_count() or 1)  # Intra-op threads for PyTorch and ONNX Runtime
+registry.num_threads = INFERENCE_THREADS
+registry.backends.update(MODEL_BACKENDS)
+registry.artifact_dir = data_path("model_cache")  # Quantized and ONNX exports
 
 # TTS Setup
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)  # Adjust speech rate
+engine = None
 
-def speak(text):
-    """Speak the given text."""
+def get_engine():
+    """Initialize the TTS engine on first use."""
+    global engine
+    if engine is None:
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 150)  # Adjust speech rate
+    return engine
+
+text_output = threading.local()
+speech = SpeechQueue(engine_factory=get_engine)  # The speech worker is the only thread that touches the engine
+
+def speak(text, block=True):
+    """Speak the given text.
+
+    By default this waits until the text has been spoken so the microphone doesn't pick up
+    the assistant; pass block=False to queue it and keep working. Ctrl+C while waiting
+    interrupts playback.
+    """
+    sink = getattr(text_output, "sink", None)
+    if sink is not None:
+        sink(text)  # A text client (see run_text_command) gets the words instead of the speakers
+        return
+    if active_pipeline is not None and active_pipeline.is_cancelled():
+        return  # The user said "stop" while this command was running
     print(f"Assistant: {text}")
-    engine.say(text)
-    engine.runAndWait()
-
-def take_command():
-    """Listen to user input and convert it to text."""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening...")
-        recognizer.pause_threshold = 1
-        audio = recognizer.listen(source)
+    speech.say(text)
+    if block:
+        wait_for_speech()
+
+def wait_for_speech():
+    """Wait until everything queued has been spoken; Ctrl+C interrupts playback."""
     try:
-        print("Recognizing...")
-        command = recognizer.recognize_google(audio)
-        print(f"You: {command}")
-        return command.lower()
-    except sr.UnknownValueError:
-        speak("Sorry, I didn't get that. Please repeat.")
-        return ""
+        speech.wait()
+    except KeyboardInterrupt:
+        speech.interrupt()
+
+def speak_stream(fetch, *args):
+    """Speak a handler's output piece by piece while it is still being produced.
+
+    fetch is called with on_text, which queues each piece for speaking straight away.
+    If nothing was streamed (e.g. the handler failed), its return value is spoken instead.
+    """
+    streamed = []
+
+    def on_text(text):
+        streamed.append(text)
+        speak(text, block=False)
+
+    result = fetch(*args, on_text=on_text)
+    if not streamed:
+        speak(result, block=False)
+    wait_for_speech()
+    return result
+
+# Speech Input
+RECOGNIZER_BACKEND = os.environ.get("RECOGNIZER_BACKEND", "google")  # "google", or offline "vosk"/"whisper"
+RECOGNIZER_OPTIONS = {
+    "google": {},
+    "vosk": {"model_path": "vosk-model-small-en-us-0.15"},  # Unpacked model from alphacephei.com/vosk/models
+    "whisper": {"model": "base.en", "threads": INFERENCE_THREADS},
+}
+VAD_SILENCE_MS = 500  # Silence that ends an utterance (the old pause_threshold was a full second)
+listener = None
+
+def show_partial(text):
+    """Echo a partial transcript on the console while the user is still speaking."""
+    print(f"\rYou: {text}...", end="", flush=True)
+
+def get_listener():
+    """Open the microphone stream and recognizer on first use; both stay open for the whole session."""
+    global listener
+    if listener is None:
+        recognizer = make_recognizer(RECOGNIZER_BACKEND, **RECOGNIZER_OPTIONS[RECOGNIZER_BACKEND])
+        listener = StreamingListener(MicrophoneSource(), EnergyVAD(), recognizer, on_partial=show_partial,
+                                     silence_ms=VAD_SILENCE_MS)
+    return listener
+
+def take_command(quiet=False):
+    """Listen to user input and convert it to text.
+
+    With quiet=True recognition failures aren't announced and audio captured while the
+    previous command ran is kept, which suits continuous listening.
+    """
+    stream = get_listener()
+    print("Listening...")
+    try:
+        with telemetry.span("recognition", backend=RECOGNIZER_BACKEND) as span:
+            listening = time.perf_counter()
+            command = stream.listen(drain=not quiet)  # Drop our own voice from the last reply
+            timings = stream.last_timings
+            if "started_at" in timings:  # Measure from speech start, not from when we began waiting
+                span.started_at(timings["started_at"])
+                span.set(idle=max(0.0, timings["started_at"] - listening))
+            span.set(chars=len(command), recognize=timings.get("recognize"),
+                     endpoint_delay=timings["endpoint"] - timings["speech_end"] if "endpoint" in timings else None)
     except sr.RequestError:
-        speak("Network error.")
+        if quiet:
+            logging.error("Speech recognition network error")
+        else:
+            speak("Network error.")
         return ""
+    if not command:
+        if not quiet:
+            speak("Sorry, I didn't get that. Please repeat.")
+        return ""
+    print(f"\rYou: {command}")
+    return command.lower()
+
+def take_utterance():
+    """Listen continuously for the pipeline: return (command, speech start, speech end), perf_counter clock."""
+    command = take_command(quiet=True)
+    timings = get_listener().last_timings
+    return command, timings.get("started_at"), timings.get("ended_at")
 
 # Greeting Function
 def greet_user():
@@ -83,8 +251,47 @@ def greet_user():
     speak("I am your virtual assistant. How can I assist you today?")
 
 # Hugging Face QA Model Function
-qa_pipeline = pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
-summarization_pipeline = pipeline("summarization", model="facebook/bart-large-cnn")
+WIKI_INDEX_PATH = data_path("wiki_index.pickle")  # Optional offline index built with `python retrieval.py build`
+WIKI_OFFLINE = False  # Answer only from the local index, never from the network
+retriever = WikipediaRetriever(ttl=24 * 3600, index_path=WIKI_INDEX_PATH, offline=WIKI_OFFLINE, executor=io_pool,
+                               session=http, api_url=WIKIPEDIA_API_URL)
+
+QA_TOP_K = 3  # Number of Wikipedia pages to read for each question
+QA_CONFIDENCE_THRESHOLD = 0.2  # Answers scored below this are treated as "not sure"
+QA_MAX_SEQ_LEN = 384  # Tokens per window, question included
+QA_DOC_STRIDE = 128  # Tokens shared between neighbouring windows
+QA_BATCH_SIZE = 32  # Windows scored per forward pass
+
+# Micro-Batching (concurrent requests share forward passes; see batching.py)
+BATCH_MAX_SIZE = 16  # Most requests merged into one QA batch
+BATCH_MAX_LATENCY_MS = 10  # Longest a request waits for others to join its batch
+SUMMARY_BATCH_MAX_SIZE = 8  # bart-large-cnn is much heavier per item
+
+def run_qa_batch(inputs):
+    """Score a batch of {"question", "context"} inputs, possibly from several requests, in one pipeline call."""
+    with telemetry.span("model", model="qa", items=len(inputs), cold=not registry.is_loaded("qa")):
+        results = registry.get("qa")(inputs, max_seq_len=QA_MAX_SEQ_LEN, doc_stride=QA_DOC_STRIDE,
+                                     batch_size=QA_BATCH_SIZE)
+    if isinstance(results, dict):  # The pipeline unwraps single-item batches
+        results = [results]
+    return results
+
+qa_scheduler = BatchScheduler(run_qa_batch, max_batch_size=BATCH_MAX_SIZE,
+                              max_latency_ms=BATCH_MAX_LATENCY_MS, name="qa")
+
+def answer_question(question, passages):
+    """Find the best answer span for question across several (title, text) passages.
+
+    The QA pipeline splits every passage into overlapping token windows and scores the
+    windows in batches of QA_BATCH_SIZE. Passages go through qa_scheduler, so concurrent
+    questions share forward passes.
+    Returns (answer, score, title) for the highest-scoring span.
+    """
+    futures = qa_scheduler.submit_many([{"question": question, "context": text} for _, text in passages])
+    results = [future.result() for future in futures]
+    best_index = max(range(len(results)), key=lambda i: results[i]["score"])
+    best = results[best_index]
+    return best["answer"].strip(), best["score"], passages[best_index][0]
 
 def ask_model(question):
     """Send a query to the Hugging Face QA model and get a response."""
@@ -92,19 +299,17 @@ def ask_model(question):
         # Check if the question is too vague or incomplete
         if len(question.split()) < 3:  # Ensure the question has at least 3 words
             return "Please provide more details or complete your question."
-        # Fetch dynamic context from Wikipedia
-        search_results = wikipedia.search(question)
-        if not search_results:
+        # Fetch dynamic context from the local index or Wikipedia (cached)
+        with telemetry.span("retrieval") as span:
+            passages = retriever.retrieve(question, k=QA_TOP_K)
+            span.set(passages=len(passages))
+        if not passages:
             return "Sorry, I couldn't find any information on that."
-        # Use the most relevant result
-        page_title = search_results[0]
-        wikipedia_page = wikipedia.page(page_title)
-        context = wikipedia_page.summary[:1000]  # First 1000 characters for more context
         # Generate response using the QA model
-        response = qa_pipeline(question=question, context=context)
-        answer = response["answer"].strip()
+        answer, score, page_title = answer_question(question, passages)
+        logging.info(f"QA answer from '{page_title}' with confidence {score:.2f}")
         # Add a fallback response
-        if not answer or "sorry" in answer.lower():
+        if not answer or score < QA_CONFIDENCE_THRESHOLD:
             return "I'm not sure about that. Would you like me to search the web?"
         return answer
     except Exception as e:
@@ -112,29 +317,95 @@ def ask_model(question):
         return "Sorry, I encountered an issue."
 
 # Sentiment Analysis Function
-sentiment_pipeline = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+SENTIMENT_MODE = "async"  # "async" runs off the critical path, "blocking" acknowledges the mood first, "off" skips it
+sentiment_cache = TTLCache(ttl=24 * 3600, max_entries=1024)
+sentiment_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+model_metrics = StageMetrics()
 
 def analyze_sentiment(text):
     """Analyze the sentiment of the given text."""
+    key = " ".join(text.lower().split())
+    with telemetry.span("model", model="sentiment", chars=len(text)) as span:
+        cached = sentiment_cache.get(key)
+        span.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+        span.set(cold=not registry.is_loaded("sentiment"))
+        start = time.perf_counter()
+        try:
+            result = registry.get("sentiment")(text)[0]
+            sentiment = result['label'], result['score']
+        except Exception as e:
+            logging.error(f"Sentiment Analysis Error: {e}")
+            span.set(error=type(e).__name__)
+            return "Neutral", 0.5
+    model_metrics.record("sentiment", time.perf_counter() - start)
+    sentiment_cache.set(key, sentiment)
+    return sentiment
+
+def log_sentiment(command, future):
+    """Record the sentiment of a command once the side channel has worked it out."""
     try:
-        result = sentiment_pipeline(text)[0]
-        return result['label'], result['score']
+        sentiment, score = future.result()
+        logging.info(f"Sentiment {sentiment} ({score:.2f}) for: {command}")
     except Exception as e:
         logging.error(f"Sentiment Analysis Error: {e}")
-        return "Neutral", 0.5
+
+# Weather Cache
+WEATHER_TTL = 10 * 60  # Current conditions change within minutes
+FORECAST_TTL = 3 * 60 * 60  # Forecasts change within hours
+WEATHER_MAX_STALE = 6 * 60 * 60  # Oldest data served while a refresh runs or the API is down
+weather_cache = StaleWhileRevalidateCache(ttl=WEATHER_TTL, max_stale=WEATHER_MAX_STALE, executor=io_pool)
+forecast_cache = StaleWhileRevalidateCache(ttl=FORECAST_TTL, max_stale=WEATHER_MAX_STALE, executor=io_pool)
+
+def normalize_city(city):
+    """Normalize a city name for use as a cache key."""
+    return " ".join(city.lower().split())
+
+def fetch_weatherapi(endpoint, city, **params):
+    """Call a WeatherAPI endpoint and return the decoded JSON."""
+    url = f"{WEATHER_API_URL}/{endpoint}.json?key={WEATHER_API_KEY}&q={city}"
+    for name, value in params.items():
+        url += f"&{name}={value}"
+    response = http.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def get_current_conditions(city):
+    """Return WeatherAPI's current conditions for city, from cache where possible.
+
+    A forecast response fetched within WEATHER_TTL also carries current conditions,
+    so it can answer a current-weather query without another request.
+    """
+    key = normalize_city(city)
+    forecast, age = forecast_cache.peek(key)
+    if forecast is not None and age <= WEATHER_TTL:
+        weather_cache.hits += 1
+        with telemetry.span("weather", cache="hit"):
+            return forecast["current"]
+    with telemetry.span("weather", cache=cache_result(weather_cache, key)):
+        return weather_cache.fetch(key, lambda: fetch_weatherapi("current", city))["current"]
+
+def cache_result(cache, key):
+    """Classify a lookup in a StaleWhileRevalidateCache as "hit", "stale" or "miss" for telemetry."""
+    value, age = cache.peek(key)
+    if value is None or age > cache.max_stale:
+        return "miss"
+    return "hit" if age <= cache.ttl else "stale"
+
+def weather_cache_stats():
+    """Return hit-rate stats for the weather and forecast caches."""
+    return {"weather": weather_cache.stats(), "forecast": forecast_cache.stats()}
 
 # Weather Function
 def get_weather(city):
     """Fetch real-time weather data using WeatherAPI."""
     try:
-        url = f"http://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={city}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        condition = data["current"]["condition"]["text"]
-        temp_c = data["current"]["temp_c"]
-        feels_like = data["current"]["feelslike_c"]
-        humidity = data["current"]["humidity"]
+        current = get_current_conditions(city)
+        condition = current["condition"]["text"]
+        temp_c = current["temp_c"]
+        feels_like = current["feelslike_c"]
+        humidity = current["humidity"]
         return (
             f"The current weather in {city} is {condition}. "
             f"It is {temp_c}°C and feels like {feels_like}°C. "
@@ -145,13 +416,15 @@ def get_weather(city):
         return "Unable to fetch weather at the moment."
 
 # Weather Forecast Function
-def get_weather_forecast(city):
-    """Fetch weather forecast data using WeatherAPI."""
+def get_weather_forecast(city, on_text=None):
+    """Fetch weather forecast data using WeatherAPI.
+
+    If on_text is given, each day's forecast is passed to it as soon as it is ready.
+    """
     try:
-        url = f"http://api.weatherapi.com/v1/forecast.json?key={WEATHER_API_KEY}&q={city}&days=3"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        key = normalize_city(city)
+        with telemetry.span("forecast", cache=cache_result(forecast_cache, key)):
+            data = forecast_cache.fetch(key, lambda: fetch_weatherapi("forecast", city, days=3))
         forecast_days = data["forecast"]["forecastday"]
         forecast_info = []
         for day in forecast_days:
@@ -164,17 +437,78 @@ def get_weather_forecast(city):
                 f"On {date}, expect {condition}. "
                 f"High: {max_temp}°C, Low: {min_temp}°C, Average: {avg_temp}°C."
             )
+            if on_text:
+                on_text(forecast_info[-1])
         return "\n".join(forecast_info)
     except Exception as e:
         logging.error(f"Weather Forecast Error: {e}")
         return "Unable to fetch weather forecast at the moment."
 
+# Summarization Function
+SUMMARY_MAX_LENGTH = 100
+SUMMARY_MIN_LENGTH = 30
+summary_cache = SummaryCache(data_path("summary_cache.db"), max_entries=5000, ttl=7 * 24 * 3600)
+
+def run_summarization_batch(items):
+    """Summarize (text, max_length, min_length) items in as few padded pipeline calls as possible."""
+    results = [None] * len(items)
+    groups = defaultdict(list)
+    for index, (_, max_length, min_length) in enumerate(items):
+        groups[(max_length, min_length)].append(index)
+    for (max_length, min_length), indices in groups.items():
+        texts = [items[i][0] for i in indices]
+        with telemetry.span("model", model="summarization", items=len(texts),
+                            cold=not registry.is_loaded("summarization")):
+            outputs = registry.get("summarization")(texts, max_length=max_length, min_length=min_length,
+                                                    do_sample=False, truncation=True, batch_size=len(texts))
+        for i, output in zip(indices, outputs):
+            results[i] = output['summary_text']
+    return results
+
+summarization_scheduler = BatchScheduler(run_summarization_batch, max_batch_size=SUMMARY_BATCH_MAX_SIZE,
+                                         max_latency_ms=BATCH_MAX_LATENCY_MS, name="summarization")
+
+def summarize_texts(texts, max_length=SUMMARY_MAX_LENGTH, min_length=SUMMARY_MIN_LENGTH):
+    """Summarize several texts in one padded batch.
+
+    Missing texts come back as empty strings and texts that are already shorter than
+    min_length are returned unchanged instead of being sent through the model.
+    Summaries are looked up in summary_cache first, so repeated texts skip the model.
+    Misses go through summarization_scheduler, so concurrent requests share batches.
+    """
+    summaries = [(text or "").strip() for text in texts]
+    pending = [i for i, text in enumerate(summaries) if len(text.split()) > min_length]
+    if not pending:
+        return summaries
+    model_name = registry.specs["summarization"][1]
+    backend = registry.backend_for("summarization")  # int8 and ONNX summaries differ slightly from fp32
+    keys = {i: SummaryCache.make_key(summaries[i], model_name, backend, max_length=max_length,
+                                     min_length=min_length, do_sample=False) for i in pending}
+    with telemetry.span("summaries", items=len(pending)) as span:
+        cached = summary_cache.get_many(keys.values())
+        misses = [i for i in pending if keys[i] not in cached]
+        span.set(hits=len(pending) - len(misses), misses=len(misses))
+        if misses:
+            batch = list(dict.fromkeys(summaries[i] for i in misses))
+            futures = summarization_scheduler.submit_many([(text, max_length, min_length) for text in batch])
+            generated = {text: future.result() for text, future in zip(batch, futures)}
+            summary_cache.put_many([(keys[i], generated[summaries[i]]) for i in misses])
+            for i in misses:
+                cached[keys[i]] = generated[summaries[i]]
+    for i in pending:
+        summaries[i] = cached[keys[i]]
+    return summaries
+
 # News Function
-def get_news():
-    """Fetch top news headlines using NewsAPI."""
+def get_news(on_text=None):
+    """Fetch top news headlines using NewsAPI.
+
+    If on_text is given, the introduction is passed to it before summarization starts
+    and each headline with its summary as soon as it is ready.
+    """
     try:
-        url = f"https://newsapi.org/v2/top-headlines?country=in&apiKey={NEWS_API_KEY}"
-        response = requests.get(url, timeout=10)
+        url = f"{NEWS_API_URL}/top-headlines?country=in&apiKey={NEWS_API_KEY}"
+        response = http.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         if data.get("status") != "ok":
@@ -182,13 +516,17 @@ def get_news():
         articles = data.get("articles", [])[:5]
         if not articles:
             return "No news found at the moment. Please try again later."
+        intro = "Here are the top news headlines:"
+        if on_text:
+            on_text(intro)
+        descriptions = [article.get('description') for article in articles]
         summaries = []
-        for article in articles:
+        for article, summary in zip(articles, summarize_texts(descriptions)):
             title = article['title']
-            description = article['description']
-            summary = summarization_pipeline(description, max_length=100, min_length=30, do_sample=False)[0]['summary_text']
-            summaries.append(f"{title}\n{summary}")
-        return "Here are the top news headlines:\n" + "\n\n".join(summaries)
+            summaries.append(f"{title}\n{summary}" if summary else title)
+            if on_text:
+                on_text(summaries[-1])
+        return intro + "\n" + "\n\n".join(summaries)
     except Exception as e:
         logging.error(f"News Error: {e}")
         return "Something went wrong while fetching the news."
@@ -197,25 +535,38 @@ def get_news():
 def web_search(query):
     """Perform a web search and provide summarized results."""
     try:
-        url = f"https://api.bing.microsoft.com/v7.0/search?q={query}"
+        url = f"{BING_SEARCH_URL}/search?q={query}"
         headers = {"Ocp-Apim-Subscription-Key": BING_SEARCH_API_KEY}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         data = response.json()
         results = data.get("webPages", {}).get("value", [])[:3]
         if not results:
             return "No results found for that query."
+        snippets = [result.get('snippet') for result in results]
         summaries = []
-        for result in results:
+        for result, summary in zip(results, summarize_texts(snippets)):
             title = result['name']
-            snippet = result['snippet']
-            summary = summarization_pipeline(snippet, max_length=100, min_length=30, do_sample=False)[0]['summary_text']
-            summaries.append(f"{title}\n{summary}")
+            summaries.append(f"{title}\n{summary}" if summary else title)
         return "Here are the top search results:\n" + "\n\n".join(summaries)
     except Exception as e:
         logging.error(f"Web Search Error: {e}")
         return "Something went wrong while performing the search."
 
+# Morning Briefing Function
+def get_morning_briefing(city=HOME_CITY):
+    """Fetch weather, news, calendar events and unread mail in parallel."""
+    results = run_parallel({
+        "weather": lambda: get_weather(city),
+        "events": get_upcoming_events,
+        "emails": check_unread_emails,
+        "news": get_news,
+    })
+    sections = [results[name] for name in ("weather", "events", "emails", "news") if results[name]]
+    if not sections:
+        return "Sorry, I couldn't put together your briefing."
+    return "Good morning! Here is your briefing.\n" + "\n\n".join(sections)
+
 # Battery Status Function
 def get_battery_status():
     """Fetch battery percentage and charging status."""
@@ -227,76 +578,148 @@ def get_battery_status():
     status = "charging" if plugged else "not charging"
     return f"Battery is at {percent}% and is currently {status}."
 
-# Reminder Function
-def set_reminder(reminder_time_str, message):
-    """Set a reminder using threading."""
-    def reminder_thread():
+# Reminder Functions
+REMINDER_DB_PATH = data_path("reminders.db")
+REMINDER_TIME_FORMATS = ("%I:%M %p", "%I %p", "%H:%M")
+RELATIVE_TIME = re.compile(r"^(?:IN\s+)?(\d+|AN?)\s*(MINUTES?|MINS?|HOURS?|HRS?)$")
+REMINDER_MESSAGE = r"\bto\s+(.+?)(?:\s+(?:at|in)\s+(?:\d|an?\b).*)?\s*$"  # "... to call mom [at 7 pm]"
+
+def deliver_reminder(reminder):
+    """Announce a due reminder through the speech queue."""
+    late = time.time() - reminder.due
+    prefix = "Missed reminder" if late > 60 else "Reminder"  # Came due while the assistant was off
+    speak(f"{prefix}: {reminder.message}", block=False)
+
+reminders = ReminderScheduler(deliver_reminder, path=REMINDER_DB_PATH)
+
+def parse_reminder_time(reminder_time_str):
+    """Return the next datetime matching a spoken time like "7:30 PM", "7 p.m.", "19:30" or "in 10 minutes"."""
+    text = re.sub(r"\s*([AP])\s*M$", r" \1M", reminder_time_str.strip().upper().replace(".", ""))
+    relative = RELATIVE_TIME.match(text)
+    if relative:
+        amount = 1 if relative.group(1) in ("A", "AN") else int(relative.group(1))
+        unit = "hours" if relative.group(2).startswith("H") else "minutes"
+        return datetime.datetime.now() + datetime.timedelta(**{unit: amount})
+    for time_format in REMINDER_TIME_FORMATS:
         try:
-            reminder_time = datetime.datetime.strptime(reminder_time_str, "%I:%M %p")
-            now = datetime.datetime.now()
-            reminder_time = reminder_time.replace(year=now.year, month=now.month, day=now.day)
-            if reminder_time < now:
-                reminder_time += datetime.timedelta(days=1)  # Set for the next day
-            time_to_wait = (reminder_time - now).total_seconds()
-            time.sleep(time_to_wait)
-            speak(f"Reminder: {message}")
-        except Exception as e:
-            speak("Sorry, I couldn't set the reminder.")
-            logging.error(f"Reminder Error: {e}")
-    thread = threading.Thread(target=reminder_thread)
-    thread.start()
+            parsed = datetime.datetime.strptime(text, time_format)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Unrecognized time: {reminder_time_str}")
+    now = datetime.datetime.now()
+    reminder_time = parsed.replace(year=now.year, month=now.month, day=now.day)
+    if reminder_time < now:
+        reminder_time += datetime.timedelta(days=1)  # Set for the next day
+    return reminder_time
 
-# Calendar Integration
-SCOPES = ['https://www.googleapis.com/auth/calendar.events']
+def set_reminder(reminder_time_str, message):
+    """Schedule a reminder; returns the Reminder, or None if the time wasn't understood."""
+    try:
+        reminder_time = parse_reminder_time(reminder_time_str)
+    except ValueError as e:
+        logging.error(f"Reminder Error: {e}")
+        return None
+    return reminders.add(reminder_time.timestamp(), message)
 
-def get_calendar_service():
-    """Authenticate and return a Google Calendar service object."""
+def describe_reminder(reminder):
+    """Phrase a reminder for speech, e.g. "7:30 PM tomorrow: call mom"."""
+    due = datetime.datetime.fromtimestamp(reminder.due)
+    day = "today" if due.date() == datetime.date.today() else "tomorrow" if \
+        due.date() == datetime.date.today() + datetime.timedelta(days=1) else due.strftime("%A %d %B")
+    return f"{due.strftime('%I:%M %p').lstrip('0')} {day}: {reminder.message}"
+
+# Google API Clients
+_google_services = {}
+_google_services_lock = threading.Lock()
+calendar_lock = threading.Lock()  # httplib2 connections inside a service object aren't thread-safe
+email_lock = threading.Lock()
+MAIL_CACHE_PATH = data_path("mail_cache.db")
+
+def load_credentials(token_path, secrets_path, scopes):
+    """Load saved OAuth credentials, refreshing or re-authorizing them if needed."""
     creds = None
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
+    if os.path.exists(token_path):
+        with open(token_path, 'rb') as token:
             creds = pickle.load(token)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(
-                'credentials.json', SCOPES)
+                secrets_path, scopes)
             creds = flow.run_local_server(port=0)
-        with open('token.pickle', 'wb') as token:
+        with open(token_path, 'wb') as token:
             pickle.dump(creds, token)
-    service = build('calendar', 'v3', credentials=creds)
-    return service
+    return creds
+
+def get_google_service(api, version, token_path, secrets_path, scopes):
+    """Build a Google API client once and reuse it.
+
+    The client refreshes its own access token when it expires, so credentials are only
+    loaded from disk the first time.
+    """
+    with _google_services_lock:
+        if api not in _google_services:
+            creds = load_credentials(token_path, secrets_path, scopes)
+            _google_services[api] = build(api, version, credentials=creds, cache_discovery=False)
+        return _google_services[api]
+
+# Calendar Integration
+SCOPES = ['https://www.googleapis.com/auth/calendar.events']
+
+def get_calendar_service():
+    """Return the shared Google Calendar service object, authenticating on first use."""
+    return get_google_service('calendar', 'v3', 'token.pickle', 'credentials.json', SCOPES)
+
+CALENDAR_MAX_AGE = 60  # Seconds an event query may be answered from the local store without syncing
+
+calendar_store = CalendarStore(get_calendar_service, lock=calendar_lock, max_age=CALENDAR_MAX_AGE)
+
+def make_event(title, date, time):
+    """Build a Calendar event resource for date (YYYY-MM-DD) and time (HH:MM)."""
+    return {
+        'summary': title,
+        'start': {
+            'dateTime': f"{date}T{time}:00+05:30",
+            'timeZone': 'Asia/Kolkata',
+        },
+        'end': {
+            'dateTime': f"{date}T{time}:30+05:30",
+            'timeZone': 'Asia/Kolkata',
+        },
+    }
 
 def add_event(title, date, time):
     """Add an event to the Google Calendar."""
+    add_events([(title, date, time)])
+
+def add_events(details):
+    """Add several (title, date, time) events to the Google Calendar in one batch request."""
     try:
-        service = get_calendar_service()
-        event = {
-            'summary': title,
-            'start': {
-                'dateTime': f"{date}T{time}:00+05:30",
-                'timeZone': 'Asia/Kolkata',
-            },
-            'end': {
-                'dateTime': f"{date}T{time}:30+05:30",
-                'timeZone': 'Asia/Kolkata',
-            },
-        }
-        event = service.events().insert(calendarId='primary', body=event).execute()
-        speak(f"Event {title} added to your calendar.")
+        with telemetry.span("google", api="calendar", op="insert", items=len(details)):
+            created = calendar_store.insert_many([make_event(*event) for event in details])
     except Exception as e:
         logging.error(f"Calendar Error: {e}")
         speak("Sorry, I couldn't add the event.")
+        return
+    added = [title for (title, _, _), event in zip(details, created) if event is not None]
+    failed = [title for (title, _, _), event in zip(details, created) if event is None]
+    if len(added) == 1:
+        speak(f"Event {added[0]} added to your calendar.")
+    elif added:
+        speak(f"{len(added)} events added to your calendar.")
+    if failed:
+        speak(f"Sorry, I couldn't add {', '.join(failed)}.")
 
 def get_upcoming_events():
-    """Get upcoming events from the Google Calendar."""
+    """Get upcoming events from the local calendar store, syncing changes when it is stale."""
     try:
-        service = get_calendar_service()
-        now = datetime.datetime.utcnow().isoformat() + 'Z'  # 'Z' indicates UTC time
-        events_result = service.events().list(calendarId='primary', timeMin=now,
-                                              maxResults=10, singleEvents=True,
-                                              orderBy='startTime').execute()
-        events = events_result.get('items', [])
+        with telemetry.span("google", api="calendar", op="upcoming") as span:
+            synced = calendar_store.synced_at
+            events = calendar_store.upcoming(limit=10)
+            span.set(cache="hit" if calendar_store.synced_at == synced else "miss")
         if not events:
             return "No upcoming events found."
         event_list = []
@@ -308,26 +731,36 @@ def get_upcoming_events():
         logging.error(f"Calendar Error: {e}")
         return "Sorry, I couldn't fetch the events."
 
+# Sent Message History
+MESSAGE_LOG_PATH = data_path("messages.db")
+PYWHATKIT_LOG_PATH = "PyWhatKit_DB.txt"  # pywhatkit appends every WhatsApp message it sends to this file
+PYWHATKIT_ARCHIVE_PATH = data_path("PyWhatKit_DB.txt.1")  # Where the file goes once imported and too big
+message_log = MessageLog(MESSAGE_LOG_PATH)
+
+def send_whatsapp(number, message):
+    """Send a WhatsApp message straight away and record it. Returns True if it was sent."""
+    try:
+        import pywhatkit
+        pywhatkit.sendwhatmsg_instantly(number, message)
+    except Exception as e:
+        logging.error(f"WhatsApp Error: {e}")
+        return False
+    message_log.record("whatsapp", number, message)
+    return True
+
+def describe_sent(sent):
+    """Describe a sent message for speaking."""
+    when = time.strftime("%B %d at %I:%M %p", time.localtime(sent.sent))
+    if sent.channel == "email":
+        return f"an email to {sent.contact} on {when}, subject {sent.subject}: {sent.message}"
+    return f"a WhatsApp message to {sent.contact} on {when}: {sent.message}"
+
 # Email Integration
 EMAIL_SCOPES = ['https://www.googleapis.com/auth/gmail.send', 'https://www.googleapis.com/auth/gmail.readonly']
 
 def get_email_service():
-    """Authenticate and return a Gmail service object."""
-    creds = None
-    if os.path.exists('email_token.pickle'):
-        with open('email_token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                'email_credentials.json', EMAIL_SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('email_token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
-    service = build('gmail', 'v1', credentials=creds)
-    return service
+    """Return the shared Gmail service object, authenticating on first use."""
+    return get_google_service('gmail', 'v1', 'email_token.pickle', 'email_credentials.json', EMAIL_SCOPES)
 
 def send_email(to, subject, message_text):
     """Send an email using Gmail."""
@@ -339,30 +772,50 @@ def send_email(to, subject, message_text):
         message['subject'] = subject
         raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
         body = {'raw': raw_message}
-        message = service.users().messages().send(userId="me", body=body).execute()
+        with email_lock, telemetry.span("google", api="gmail", op="send", bytes=len(raw_message)):
+            message = service.users().messages().send(userId="me", body=body).execute()
+        message_log.record("email", to, message_text, subject=subject)
         speak(f"Email sent to {to}.")
     except Exception as e:
         logging.error(f"Email Error: {e}")
         speak("Sorry, I couldn't send the email.")
 
+mail_sync = MailSync(get_email_service, path=MAIL_CACHE_PATH, lock=email_lock)
+
 def check_unread_emails():
-    """Check for unread emails."""
+    """Check for unread emails, syncing only the changes since the last check."""
     try:
-        service = get_email_service()
-        results = service.users().messages().list(userId='me', labelIds=['INBOX', 'UNREAD']).execute()
-        messages = results.get('messages', [])
-        if not messages:
+        with telemetry.span("google", api="gmail", op="sync"):
+            mail_sync.sync()
+        unread_count = mail_sync.unread_count()
+        if not unread_count:
             return "No unread emails."
-        unread_count = len(messages)
         return f"You have {unread_count} unread emails."
     except Exception as e:
         logging.error(f"Email Error: {e}")
         return "Sorry, I couldn't check for unread emails."
 
+def read_new_emails(limit=5):
+    """Read out the sender and subject of the newest unread emails."""
+    try:
+        with telemetry.span("google", api="gmail", op="sync"):
+            mail_sync.sync()
+    except Exception as e:
+        logging.error(f"Email Error: {e}")  # Fall back to what was cached at the last sync
+    messages = mail_sync.unread(limit=limit)
+    if not messages:
+        return "No unread emails."
+    lines = [f"From {sender_name(message['sender'])}: {(message['subject'] or 'no subject').rstrip('.!?')}."
+             for message in messages]
+    total = mail_sync.unread_count()
+    more = f" And {total - len(messages)} more." if total > len(messages) else ""
+    return " ".join(lines) + more
+
 # Music Control Functions
 def control_music(action):
     """Control music playback (play, pause, skip)."""
     try:
+        import pywhatkit  # Imported on use: it needs a display, which a headless server doesn't have
         if action == "play":
             pywhatkit.playonyt("resume")
             speak("Resuming playback.")
@@ -378,147 +831,445 @@ def control_music(action):
         logging.error(f"Music Control Error: {e}")
         speak("Sorry, I couldn't control the music.")
 
+# Startup Timing
+def check_startup_time():
+    """Log how long the assistant took to become ready and flag a blown budget."""
+    elapsed = time.time() - psutil.Process().create_time()
+    logging.info(f"Assistant ready {elapsed:.2f}s after process start")
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        logging.warning(f"Startup took {elapsed:.2f}s, over the {STARTUP_BUDGET_SECONDS:.1f}s budget")
+    return elapsed
+
 # Main Assistant Logic
-def run_assistant():
-    """Run the virtual assistant."""
+ASYNC_PIPELINE = True  # Keep listening while slow commands run (see pipeline.py)
+active_pipeline = None
+
+def listen_for_reply():
+    """Return the user's answer to a follow-up question."""
+    if getattr(text_output, "sink", None) is not None:
+        return ""  # Text clients send complete commands and can't answer follow-ups
+    if active_pipeline is not None:
+        return active_pipeline.wait_for_reply()
+    return take_command()
+
+def acknowledge_sentiment(command):
+    """Handle the sentiment of a command according to SENTIMENT_MODE.
+
+    In "async" mode the analysis is queued on its own worker and only logged, so command
+    dispatch never waits for the sentiment model. "blocking" keeps the original behaviour of
+    acknowledging the mood before the command is handled.
+    """
+    if SENTIMENT_MODE == "async":
+        future = sentiment_pool.submit(analyze_sentiment, command)
+        future.add_done_callback(lambda done: log_sentiment(command, done))
+    elif SENTIMENT_MODE == "blocking":
+        sentiment, score = analyze_sentiment(command)
+        if sentiment == "POSITIVE":
+            speak("Great! How can I assist you today?")
+        elif sentiment == "NEGATIVE":
+            speak("I'm here to help. What do you need assistance with?")
+
+# Command Routing
+USE_INTENT_CLASSIFIER = True  # Match commands with no keyword against example utterances first
+router = IntentRouter(classifier=ExampleClassifier(min_similarity=0.5) if USE_INTENT_CLASSIFIER else None)
+
+@router.intent("time", ["time", "what time"],
+               examples=["what's the time", "tell me the time", "current time", "what time is it", "clock"])
+def handle_time(match):
+    """Tell the current time."""
+    current_time = datetime.datetime.now().strftime('%I:%M %p')
+    speak(f"The time is {current_time}")
+
+@router.intent("music_control", ["play music", "resume music", "pause music", "stop music", "skip music",
+                                 "next song", "skip song"], priority=5,
+               examples=["pause the music", "resume the song", "skip this track", "next track"])
+def handle_music_control(match):
+    """Play, pause or skip the current track."""
+    if 'pause' in match.text or 'stop' in match.text:
+        control_music("pause")
+    elif 'skip' in match.text or 'next' in match.text:
+        control_music("skip")
+    else:
+        control_music("play")
+
+@router.intent("play", ["play"], slots={"song": SONG},
+               examples=["play despacito", "play a song by arijit singh"])
+def handle_play(match):
+    """Play a song on YouTube."""
+    song = match.slots.get("song")
+    if song:
+        speak(f"Playing {song} on YouTube.")
+        import pywhatkit
+        pywhatkit.playonyt(song)
+    else:
+        speak("Please specify a song to play.")
+
+@router.intent("weather", ["weather", "temperature"], slots={"city": CITY},
+               examples=["how hot is it outside", "is it raining", "how cold is it", "humidity outside"])
+def handle_weather(match):
+    """Report the current weather for a city."""
+    city = match.slots.get("city")
+    if not city:
+        speak("Which city do you want the weather for?")
+        city = listen_for_reply()
+    if city:
+        weather_info = get_weather(city)
+        speak(weather_info)
+    else:
+        speak("I didn't catch the city name.")
+
+@router.intent("weather_forecast", ["weather forecast", "forecast"], priority=5, slots={"city": CITY},
+               examples=["will it rain tomorrow", "weather for the next few days"])
+def handle_weather_forecast(match):
+    """Report the three-day forecast for a city."""
+    city = match.slots.get("city")
+    if not city:
+        speak("Which city do you want the weather forecast for?")
+        city = listen_for_reply()
+    if city:
+        speak_stream(get_weather_forecast, city)
+    else:
+        speak("I didn't catch the city name.")
+
+@router.intent("briefing", ["briefing", "morning briefing"], examples=["brief me", "good morning summary"])
+def handle_briefing(match):
+    """Read the morning briefing."""
+    speak("Putting together your briefing.", block=False)
+    speak(get_morning_briefing())
+
+@router.intent("news", ["news", "headlines"], examples=["what's happening today", "latest stories"])
+def handle_news(match):
+    """Read the top headlines with summaries."""
+    speak("Fetching the latest news headlines.", block=False)
+    speak_stream(get_news)
+
+@router.intent("battery", ["battery", "battery status"], examples=["how much charge is left", "is the laptop charging"])
+def handle_battery(match):
+    """Report the battery status."""
+    status = get_battery_status()
+    speak(status)
+
+@router.intent("set_reminder", ["set reminder", "set a reminder", "remind me"], priority=5,
+               slots={"time": TIME, "message": REMINDER_MESSAGE},
+               examples=["create a reminder", "add a reminder", "reminder for"])
+def handle_set_reminder(match):
+    """Set a reminder, asking for the time and message if the command didn't include them."""
+    reminder_time = match.slots.get("time")
+    if not reminder_time:
+        speak("At what time should I remind you? Say a time like 7:30 PM, or in 10 minutes.")
+        reminder_time = listen_for_reply()
+    message = match.slots.get("message")
+    if not message:
+        speak("What should I remind you about?")
+        message = listen_for_reply()
+    reminder = set_reminder(reminder_time, message) if reminder_time and message else None
+    if reminder:
+        speak(f"Reminder set for {describe_reminder(reminder)}")
+    else:
+        speak("Reminder time or message not understood.")
+
+@router.intent("list_reminders", ["my reminders", "list reminders", "show reminders", "pending reminders"],
+               priority=5, examples=["what reminders do i have", "which reminders are set"])
+def handle_list_reminders(match):
+    """Read out the pending reminders."""
+    pending = reminders.list()
+    if not pending:
+        speak("You have no reminders.")
+        return
+    speak(f"You have {len(pending)} reminders. " +
+          " ".join(f"{i}. {describe_reminder(reminder)}." for i, reminder in enumerate(pending, 1)))
+
+NUMBER_WORDS = {"one": 1, "first": 1, "two": 2, "second": 2, "three": 3, "third": 3, "four": 4, "fourth": 4,
+                "five": 5, "fifth": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+@router.intent("cancel_reminder", ["cancel reminder", "cancel the reminder", "cancel my reminder", "delete reminder",
+                                   "remove reminder"], priority=5, examples=["forget the reminder"])
+def handle_cancel_reminder(match):
+    """Cancel a pending reminder picked by its number or by words from its message."""
+    pending = reminders.list()
+    if not pending:
+        speak("You have no reminders to cancel.")
+        return
+    if len(pending) == 1:
+        chosen = pending[0]
+    else:
+        speak("Which one? " + " ".join(f"{i}. {describe_reminder(reminder)}."
+                                       for i, reminder in enumerate(pending, 1)))
+        reply = listen_for_reply()
+        number = next((int(word) if word.isdigit() else NUMBER_WORDS[word]
+                       for word in reply.split() if word.isdigit() or word in NUMBER_WORDS), None)
+        if number is not None:
+            chosen = pending[number - 1] if 1 <= number <= len(pending) else None
+        else:
+            chosen = next((reminder for reminder in pending if reply and reply in reminder.message.lower()), None)
+    if chosen and reminders.cancel(chosen.id):
+        speak(f"Cancelled the reminder for {describe_reminder(chosen)}")
+    else:
+        speak("I couldn't find that reminder.")
+
+@router.intent("whatsapp", ["send whatsapp", "whatsapp message", "message on whatsapp"], priority=5,
+               examples=["text someone on whatsapp", "send a whatsapp"])
+def handle_whatsapp(match):
+    """Send a WhatsApp message."""
+    speak("Whom do you want to message? Say the mobile number with country code.")
+    number = listen_for_reply().replace(" ", "").replace("+", "")
+    # Validate phone number
+    pattern = r"^\+?[1-9]\d{1,14}$"  # E.164 format
+    if re.match(pattern, number):
+        full_number = f"+{number}" if not number.startswith("+") else number
+        speak("What message should I send?")
+        message = listen_for_reply()
+        if message:
+            if send_whatsapp(full_number, message):
+                speak("Sending message now!")
+            else:
+                speak("Failed to send message.")
+        else:
+            speak("I didn't hear the message clearly.")
+    else:
+        speak("That doesn't sound like a valid number.")
+
+@router.intent("last_message", ["who did i message last", "who did i text last", "who did i email last",
+                               "my last message", "last message"], priority=5,
+               examples=["who was the last person i messaged", "what did i send last"])
+def handle_last_message(match):
+    """Say who the last WhatsApp message or email went to."""
+    sent = message_log.last()
+    if sent is None:
+        speak("You haven't sent any messages yet.")
+    else:
+        speak(f"Your last message was {describe_sent(sent)}")
+
+@router.intent("resend_message", ["resend my last message", "resend the last message", "resend last message",
+                                  "resend my message", "send my last message again"], priority=5,
+               slots={"contact": r"\bto\s+(.+?)\s*$"}, examples=["send that message again", "repeat my last message"])
+def handle_resend_message(match):
+    """Send the last message again, either the very last one or the last one to the contact named."""
+    spoken = match.slots.get("contact")
+    if spoken:
+        contact = message_log.find_contact(spoken)
+        sent = message_log.last(contact) if contact else None
+        if sent is None:
+            speak(f"I couldn't find a message you sent to {spoken}.")
+            return
+    else:
+        sent = message_log.last()
+        if sent is None:
+            speak("You haven't sent any messages yet.")
+            return
+    speak(f"Should I resend {describe_sent(sent)}?")
+    if "yes" not in listen_for_reply().lower().split():
+        speak("Okay, I won't send it.")
+        return
+    if sent.channel == "email":
+        send_email(sent.contact, sent.subject or "", sent.message)
+    elif send_whatsapp(sent.contact, sent.message):
+        speak("Sending message now!")
+    else:
+        speak("Failed to send message.")
+
+@router.intent("open", ["open"], slots={"website": REST}, examples=["go to youtube", "launch google"])
+def handle_open(match):
+    """Open a website in the browser."""
+    website = match.slots.get("website")
+    if website:
+        url = f"https://{website.lower().replace(' ', '')}.com"
+        speak(f"Opening {website}.")
+        webbrowser.open(url)
+    else:
+        speak("Please specify a website to open.")
+
+@router.intent("search", ["search", "search for", "look up"], slots={"query": REST},
+               examples=["google something", "find information online"])
+def handle_search(match):
+    """Search the web and read summarized results."""
+    query = match.slots.get("query")
+    if not query:
+        speak("What would you like to search for?")
+        query = listen_for_reply()
+    if query:
+        results = web_search(query)
+        speak(results)
+    else:
+        speak("Please specify a search query.")
+
+@router.intent("add_event", ["add event", "add an event", "add calendar event", "create event"], priority=5,
+               examples=["schedule a meeting", "put a meeting on my calendar"])
+def handle_add_event(match):
+    """Add one or more events to the calendar."""
+    events = []
+    while True:
+        speak("What is the title of the event?")
+        title = listen_for_reply()
+        speak("When is the event? Please say the date in YYYY-MM-DD format.")
+        date = listen_for_reply()
+        speak("At what time is the event? Please say the time in HH:MM format.")
+        time = listen_for_reply()
+        if title and date and time:
+            events.append((title, date, time))
+        else:
+            speak("Event details not understood.")
+        speak("Do you want to add another event?")
+        if "yes" not in listen_for_reply().split():
+            break
+    if events:
+        add_events(events)  # One batch request for all of them
+
+@router.intent("upcoming_events", ["upcoming events", "my events", "calendar"],
+               examples=["what's on my schedule", "any meetings today"])
+def handle_upcoming_events(match):
+    """Read the upcoming calendar events."""
+    events = get_upcoming_events()
+    speak(events)
+
+@router.intent("send_email", ["send email", "send an email", "send a mail"], priority=5,
+               examples=["write an email", "compose a mail"])
+def handle_send_email(match):
+    """Send an email."""
+    speak("To whom should I send the email? Please say the recipient's email address.")
+    to = listen_for_reply()
+    speak("What is the subject of the email?")
+    subject = listen_for_reply()
+    speak("What is the message of the email?")
+    message_text = listen_for_reply()
+    if to and subject and message_text:
+        send_email(to, subject, message_text)
+    else:
+        speak("Email details not understood.")
+
+@router.intent("check_emails", ["check emails", "check email", "check my emails", "unread emails"], priority=5,
+               examples=["any new mail", "do i have new emails", "read my inbox"])
+def handle_check_emails(match):
+    """Report unread emails."""
+    unread_emails = check_unread_emails()
+    speak(unread_emails)
+
+@router.intent("read_emails", ["read my emails", "read my email", "read my new emails", "read me my emails",
+                               "read me my new emails", "who emailed me"], priority=5,
+               examples=["what are my new emails", "read the latest mail"])
+def handle_read_emails(match):
+    """Read the sender and subject of the newest unread emails."""
+    speak(read_new_emails())
+
+@router.intent("model_status", ["model status", "status report"], priority=5)
+def handle_model_status(match):
+    """Report model load times, cache and batch statistics, speech latency and stage latencies."""
+    stats = summary_cache.stats()
+    report = (registry.report() + "\n"
+              f"Summary cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries.")
+    report += f"\nReminders: {len(reminders.list())} pending."
+    message_stats = message_log.stats()
+    report += f"\nMessage history: {message_stats['messages']} messages to {message_stats['contacts']} contacts."
+    for name, cache_stats in weather_cache_stats().items():
+        lookups = cache_stats['hits'] + cache_stats['stale_hits'] + cache_stats['misses']
+        report += f"\n{name.capitalize()} cache: {cache_stats['hit_rate']:.0%} hit rate over {lookups} lookups."
+    for name, scheduler in (("Question answering", qa_scheduler), ("Summarization", summarization_scheduler)):
+        batch_stats = scheduler.stats()
+        if batch_stats['batches']:
+            report += (f"\n{name} batches: {batch_stats['batches']} batches, "
+                       f"{batch_stats['mean_batch_size']:.1f} items on average, {batch_stats['failed_batches']} failed.")
+    speech_stats = speech.stats()
+    if speech.error is not None:
+        report += f"\nSpeech engine unavailable: {speech.error}"
+    elif speech_stats['responses']:
+        report += (f"\nTime to first audio: {speech_stats['mean']:.2f}s on average, "
+                   f"{speech_stats['last']:.2f}s last, over {speech_stats['responses']} responses.")
+    if model_metrics.summary():
+        report += "\n" + model_metrics.report()
+    if active_pipeline is not None:
+        report += "\n" + active_pipeline.metrics.report()
+    speak(report)
+
+@router.intent("exit", ["exit", "stop", "goodbye", "quit"])
+def handle_exit(match):
+    """Say goodbye and stop the assistant."""
+    speak("Goodbye! Have a great day!")
+    return False
+
+def handle_question(command):
+    """Answer anything that isn't a known command with the QA model."""
+    speak("Let me check that for you.")
+    try:
+        answer = ask_model(command)
+        speak(answer)
+    except Exception as e:
+        speak("Sorry, I couldn't process that.")
+
+router.fallback = handle_question
+router.compile()
+
+def handle_command(command):
+    """Process one command. Returns False when the user asked the assistant to exit."""
+    with telemetry.span("command", chars=len(command)) as span:
+        match = router.match(command)
+        span.set(intent=match.intent.name if match else "question")
+        result = match.intent.handler(match) if match else router.fallback(command)
+    return result is not False
+
+# Intents that make sense for remote text clients; the rest act on this machine (browser, YouTube, WhatsApp)
+TEXT_INTENTS = {"time", "weather", "weather_forecast", "news", "battery", "search", "model_status"}
+# Intents that read the user's calendar, mail or messages; text clients only get them when the server opts in
+PERSONAL_TEXT_INTENTS = {"briefing", "upcoming_events", "check_emails", "read_emails", "last_message"}
+
+def run_text_command(command, on_text, allow_personal=False):
+    """Handle a command from a text client, passing each response to on_text instead of speaking it."""
+    match = router.match(command)
+    text_output.sink = on_text
+    try:
+        with telemetry.span("command", chars=len(command), intent=match.intent.name if match else "question",
+                            client="text"):
+            if match is None:
+                handle_question(command)
+            elif match.intent.name in TEXT_INTENTS:
+                match.intent.handler(match)
+            elif match.intent.name in PERSONAL_TEXT_INTENTS and allow_personal:
+                match.intent.handler(match)
+            elif match.intent.name in PERSONAL_TEXT_INTENTS:
+                on_text("Personal commands are turned off on this server.")
+            else:
+                on_text("That command is only available on the voice assistant.")
+    finally:
+        text_output.sink = None
+
+def start_assistant():
+    """Check startup time, greet the user, reload reminders, import pywhatkit's log and start warming the models."""
+    check_startup_time()
     greet_user()
+    reminders.start()
+    try:
+        message_log.import_pywhatkit(PYWHATKIT_LOG_PATH, archive_path=PYWHATKIT_ARCHIVE_PATH)
+    except Exception as e:
+        logging.error(f"Message Import Error: {e}")
+    if WARM_UP_MODELS:
+        registry.warm_up(background=True)
+
+def run_assistant():
+    """Run the virtual assistant one command at a time."""
+    start_assistant()
     while True:
         command = take_command()
         if command:
-            # Analyze sentiment of the command
-            sentiment, score = analyze_sentiment(command)
-            if sentiment == "POSITIVE":
-                speak("Great! How can I assist you today?")
-            elif sentiment == "NEGATIVE":
-                speak("I'm here to help. What do you need assistance with?")
-            # Process the command
-            if 'time' in command:
-                current_time = datetime.datetime.now().strftime('%I:%M %p')
-                speak(f"The time is {current_time}")
-            elif 'play' in command:
-                song = command.replace('play', '').strip()
-                if song:
-                    speak(f"Playing {song} on YouTube.")
-                    pywhatkit.playonyt(song)
-                else:
-                    speak("Please specify a song to play.")
-            elif 'weather' in command:
-                speak("Which city do you want the weather for?")
-                city = take_command()
-                if city:
-                    weather_info = get_weather(city)
-                    speak(weather_info)
-                else:
-                    speak("I didn't catch the city name.")
-            elif 'weather forecast' in command:
-                speak("Which city do you want the weather forecast for?")
-                city = take_command()
-                if city:
-                    forecast_info = get_weather_forecast(city)
-                    speak(forecast_info)
-                else:
-                    speak("I didn't catch the city name.")
-            elif 'news' in command:
-                speak("Fetching the latest news headlines.")
-                news = get_news()
-                speak(news)
-            elif 'battery' in command or 'battery status' in command:
-                status = get_battery_status()
-                speak(status)
-            elif 'set reminder' in command:
-                speak("At what time should I remind you? Say the time in HH:MM AM or PM format.")
-                reminder_time = take_command()
-                speak("What should I remind you about?")
-                message = take_command()
-                if reminder_time and message:
-                    set_reminder(reminder_time.upper(), message)
-                    speak(f"Reminder set for {reminder_time} to {message}")
-                else:
-                    speak("Reminder time or message not understood.")
-            elif 'send whatsapp' in command or 'whatsapp message' in command:
-                speak("Whom do you want to message? Say the mobile number with country code.")
-                number = take_command().replace(" ", "").replace("+", "")
-                # Validate phone number
-                pattern = r"^\+?[1-9]\d{1,14}$"  # E.164 format
-                if re.match(pattern, number):
-                    full_number = f"+{number}" if not number.startswith("+") else number
-                    speak("What message should I send?")
-                    message = take_command()
-                    if message:
-                        try:
-                            pywhatkit.sendwhatmsg_instantly(full_number, message)
-                            speak("Sending message now!")
-                        except Exception as e:
-                            logging.error(f"WhatsApp Error: {e}")
-                            speak("Failed to send message.")
-                    else:
-                        speak("I didn't hear the message clearly.")
-                else:
-                    speak("That doesn't sound like a valid number.")
-            elif 'open' in command:
-                website = command.replace('open', '').strip()
-                if website:
-                    url = f"https://{website.lower().replace(' ', '')}.com"
-                    speak(f"Opening {website}.")
-                    webbrowser.open(url)
-                else:
-                    speak("Please specify a website to open.")
-            elif 'search' in command:
-                speak("What would you like to search for?")
-                query = take_command()
-                if query:
-                    results = web_search(query)
-                    speak(results)
-                else:
-                    speak("Please specify a search query.")
-            elif 'add event' in command:
-                speak("What is the title of the event?")
-                title = take_command()
-                speak("When is the event? Please say the date in YYYY-MM-DD format.")
-                date = take_command()
-                speak("At what time is the event? Please say the time in HH:MM format.")
-                time = take_command()
-                if title and date and time:
-                    add_event(title, date, time)
-                else:
-                    speak("Event details not understood.")
-            elif 'upcoming events' in command:
-                events = get_upcoming_events()
-                speak(events)
-            elif 'send email' in command:
-                speak("To whom should I send the email? Please say the recipient's email address.")
-                to = take_command()
-                speak("What is the subject of the email?")
-                subject = take_command()
-                speak("What is the message of the email?")
-                message_text = take_command()
-                if to and subject and message_text:
-                    send_email(to, subject, message_text)
-                else:
-                    speak("Email details not understood.")
-            elif 'check emails' in command:
-                unread_emails = check_unread_emails()
-                speak(unread_emails)
-            elif 'play music' in command or 'pause music' in command or 'skip music' in command:
-                if 'play' in command:
-                    control_music("play")
-                elif 'pause' in command:
-                    control_music("pause")
-                elif 'skip' in command:
-                    control_music("skip")
-            elif 'exit' in command or 'stop' in command:
-                speak("Goodbye! Have a great day!")
+            speech.mark_response()
+            acknowledge_sentiment(command)
+            if handle_command(command) is False:
                 break
-            else:
-                speak("Let me check that for you.")
-                try:
-                    answer = ask_model(command)
-                    speak(answer)
-                except Exception as e:
-                    speak("Sorry, I couldn't process that.")
         else:
             speak("Please say something.")
 
+def run_assistant_pipelined():
+    """Run the virtual assistant with recognition, NLP, handlers and speech as separate stages."""
+    global active_pipeline
+    start_assistant()
+    active_pipeline = CommandPipeline(listen=take_utterance, analyze=acknowledge_sentiment,
+                                      handle=handle_command, speech=speech)
+    try:
+        active_pipeline.run()
+    finally:
+        active_pipeline = None
+
 # Run the Assistant
 if __name__ == "__main__":
-    run_assistant()
+    if ASYNC_PIPELINE:
+        run_assistant_pipelined()
+    else:
+        run_assistant()
@@ -0,0 +1,114 @@
+# Dynamic Micro-Batching Scheduler
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """Collect concurrent model requests into batches run on one inference thread.
+
+    Callers submit single items and get a Future back. The inference thread waits for the
+    first item, then keeps collecting until it has max_batch_size items or max_latency_ms
+    has passed, and hands the whole batch to process_batch, which must return one result
+    per item in the same order. If a batch fails, its items are retried one at a time, so
+    one bad input only fails its own future.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_latency_ms=10, name="batch"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self._latencies = deque(maxlen=5000)  # Seconds from submit() to result, per item
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result."""
+        self._start()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def submit_many(self, items):
+        """Queue several items at once; they are likely to share a batch."""
+        return [self.submit(item) for item in items]
+
+    def __call__(self, item):
+        """Process one item and wait for its result."""
+        return self.submit(item).result()
+
+    def stats(self):
+        """Return batch counts and per-item latency percentiles in seconds."""
+        latencies = sorted(self._latencies)
+        result = {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "failed_batches": self.failed_batches,
+        }
+        if latencies:
+            result["p50"] = latencies[len(latencies) // 2]
+            result["p99"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return result
+
+    def _start(self):
+        """Start the inference thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-inference", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or the deadline passes."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_latency_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, items):
+        """Run process_batch and check it returned one result per item."""
+        results = self.process_batch(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"{self.name}: got {len(results)} results for {len(items)} items")
+        return results
+
+    def _run(self):
+        """Inference loop: run each collected batch and resolve its futures."""
+        while True:
+            batch = self._collect()
+            try:
+                outcomes = [(result, None) for result in self._process([item for item, _, _ in batch])]
+            except Exception as e:
+                self.failed_batches += 1
+                logging.error(f"Batch Error ({self.name}): {e}")
+                outcomes = [(None, e)] if len(batch) == 1 else [self._retry(item) for item, _, _ in batch]
+            done = time.perf_counter()
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future, submitted), (result, error) in zip(batch, outcomes):
+                self._latencies.append(done - submitted)
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _retry(self, item):
+        """Run one item of a failed batch on its own; returns (result, None) or (None, exception)."""
+        try:
+            return self._process([item])[0], None
+        except Exception as e:
+            logging.error(f"Batch Item Error ({self.name}): {e}")
+            return None, e
@@ -0,0 +1,169 @@
+# Benchmark: fp32 vs int8 vs ONNX Runtime for each Hugging Face pipeline
+# Usage: python benchmarks/bench_backends.py [--models sentiment qa summarization] [--backends fp32 int8 onnx]
+# Each (model, backend) pair runs in its own process so peak RSS is measured in isolation.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models import BACKENDS, MODEL_SPECS  # noqa: E402
+from storage import data_path  # noqa: E402
+
+SENTIMENT_INPUTS = [
+    "what's the time",
+    "this is the best assistant i have ever used",
+    "the news summary was wrong again and i'm annoyed",
+    "play some relaxing music",
+    "i can't believe the weather forecast failed again",
+    "thanks, that was really helpful",
+]
+
+QA_INPUTS = [
+    ("Who created Python?",
+     "Python is a high-level, general-purpose programming language. It was created by Guido van Rossum "
+     "and first released in 1991. Its design philosophy emphasizes code readability."),
+    ("Where is the Eiffel Tower?",
+     "The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris, France. It is named "
+     "after the engineer Gustave Eiffel, whose company designed and built the tower from 1887 to 1889."),
+    ("How tall is Mount Everest?",
+     "Mount Everest is Earth's highest mountain above sea level, located in the Mahalangur Himal "
+     "sub-range of the Himalayas. Its elevation of 8,848.86 m was most recently established in 2020."),
+]
+
+SUMMARIZATION_INPUTS = [
+    "The city council approved a new budget on Tuesday that increases spending on public transport, "
+    "road repairs and school maintenance, while postponing a planned stadium renovation until next year "
+    "because of rising construction costs and delays in securing federal matching funds.",
+    "Scientists at the national observatory reported the discovery of a small asteroid that will pass "
+    "between the Earth and the Moon next month. They stressed that there is no risk of impact and invited "
+    "amateur astronomers to help track the object as it moves across the night sky.",
+    "Heavy monsoon rain caused flooding in several low-lying districts over the weekend, forcing schools to "
+    "close and disrupting train services. Officials said relief camps had been set up and that water levels "
+    "were expected to recede once the rain eases later in the week.",
+]
+
+
+TASKS = {name: spec[0] for name, spec in MODEL_SPECS.items()}
+BENCH_INPUTS = {"sentiment": SENTIMENT_INPUTS, "qa": QA_INPUTS, "summarization": SUMMARIZATION_INPUTS}
+
+
+def run_model(model, pipe, item):
+    """Run one input through a pipeline and return a comparable output."""
+    task = TASKS[model]
+    if task == "sentiment-analysis":
+        return pipe(item)[0]["label"]
+    if task == "question-answering":
+        question, context = item
+        return pipe(question=question, context=context)["answer"].strip()
+    return pipe(item, max_length=100, min_length=30, do_sample=False)[0]["summary_text"]
+
+
+def worker(model, backend, threads, repeat):
+    """Load one model on one backend, time it and print the results as JSON."""
+    from models import ModelRegistry
+    registry = ModelRegistry(backend=backend, artifact_dir=data_path("model_cache"), num_threads=threads)
+    start = time.perf_counter()
+    pipe = registry.get(model)
+    load_time = time.perf_counter() - start
+    inputs = BENCH_INPUTS[model]
+    outputs = [run_model(model, pipe, item) for item in inputs]  # Also serves as warm-up
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            run_model(model, pipe, item)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(json.dumps({
+        "model": model,
+        "backend": registry.backend_for(model),
+        "load_time": load_time,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+        "outputs": outputs,
+    }))
+
+
+def check_cache(model, threads):
+    """Load a model whose int8 export is already cached and print whether the cache was used."""
+    import logging
+    from models import ModelRegistry
+    logging.basicConfig(level=logging.WARNING)  # So the parent can spot ERROR lines
+    registry = ModelRegistry(backend="int8", artifact_dir=data_path("model_cache"), num_threads=threads)
+    registry.get(model)
+    print(json.dumps({"cache_hit": registry.artifact_hits.get(model, False)}))
+
+
+def token_f1(a, b):
+    """Unigram F1 between two strings, used to compare generated summaries."""
+    a_tokens, b_tokens = a.lower().split(), b.lower().split()
+    common = sum(min(a_tokens.count(word), b_tokens.count(word)) for word in set(a_tokens))
+    if not common:
+        return 0.0
+    precision, recall = common / len(a_tokens), common / len(b_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def agreement(model, reference, outputs):
+    """Compare a backend's outputs with the fp32 outputs."""
+    if TASKS[model] == "summarization":
+        return sum(token_f1(a, b) for a, b in zip(reference, outputs)) / len(outputs)
+    return sum(a == b for a, b in zip(reference, outputs)) / len(outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends for each pipeline.")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_SPECS), choices=list(MODEL_SPECS))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--threads", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", nargs=2, metavar=("MODEL", "BACKEND"), help=argparse.SUPPRESS)
+    parser.add_argument("--check-cache", metavar="MODEL", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.threads, args.repeat)
+        return
+    if args.check_cache:
+        check_cache(args.check_cache, args.threads)
+        return
+
+    print(f"{'model':<14}{'backend':<9}{'load':>8}{'p50':>10}{'p95':>10}{'peak RSS':>11}{'agreement':>11}")
+    for model in args.models:
+        reference = None
+        for backend in ["fp32"] + [b for b in args.backends if b != "fp32"]:
+            command = [sys.executable, os.path.abspath(__file__), "--worker", model, backend,
+                       "--threads", str(args.threads), "--repeat", str(args.repeat)]
+            completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+            if completed.returncode != 0:
+                print(f"{model:<14}{backend:<9} failed: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            if reference is None:
+                reference = result["outputs"]
+            score = agreement(model, reference, result["outputs"])
+            print(f"{model:<14}{result['backend']:<9}{result['load_time']:>7.1f}s"
+                  f"{result['p50'] * 1000:>8.0f}ms{result['p95'] * 1000:>8.0f}ms"
+                  f"{result['peak_rss_mb']:>8.0f} MB{score:>10.0%}")
+
+    # The int8 runs above left an export behind; loading again must use it without falling back to fp32
+    failures = 0
+    for model in args.models if "int8" in args.backends else []:
+        command = [sys.executable, os.path.abspath(__file__), "--check-cache", model, "--threads", str(args.threads)]
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+        errors = [line for line in completed.stderr.splitlines() if "ERROR" in line or "Error" in line]
+        hit = completed.returncode == 0 and json.loads(completed.stdout.strip().splitlines()[-1])["cache_hit"]
+        print(f"{model:<14}int8 reload: {'cache hit' if hit else 'MISS'}, {len(errors)} errors logged")
+        failures += not hit or bool(errors)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: direct per-request inference vs the micro-batching scheduler under concurrent load
+# Usage: python benchmarks/bench_batching.py [--clients 16] [--requests 20] [--real]
+# By default the model is simulated by a cost model (fixed per-call overhead plus a smaller
+# per-item cost), which is how padded transformer batches behave on CPU. --real uses the QA pipeline.
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batching import BatchScheduler  # noqa: E402
+
+QUESTION = {"question": "Who designed the Eiffel Tower?",
+            "context": "The Eiffel Tower was designed by the engineering company of Gustave Eiffel "
+                       "and built for the 1889 World's Fair in Paris."}
+
+
+def simulated_model(overhead_ms, per_item_ms):
+    """Return a batch function that sleeps like one padded forward pass on a single inference core."""
+    lock = threading.Lock()  # One forward pass at a time, like a CPU-bound model
+
+    def run(items):
+        with lock:
+            time.sleep((overhead_ms + per_item_ms * len(items)) / 1000)
+        return list(items)
+    return run
+
+
+def real_model():
+    """Return a batch function backed by the QA pipeline."""
+    from models import registry
+    pipe = registry.get("qa")
+    lock = threading.Lock()  # Concurrent calls on one pipeline would just contend for the same cores
+
+    def run(items):
+        with lock:
+            results = pipe(items, batch_size=len(items))
+        return [results] if isinstance(results, dict) else results
+    return run
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_load(call, clients, requests):
+    """Have clients threads each make requests sequential calls; return (throughput, latencies)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            call(QUESTION)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    total = time.perf_counter() - start
+    return len(latencies) / total, latencies
+
+
+def report(label, throughput, latencies, extra=""):
+    print(f"{label:<28} {throughput:>8.1f} req/s   p50 {percentile(latencies, 0.5) * 1000:>7.1f}ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:>7.1f}ms{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare direct inference with micro-batched inference.")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent callers")
+    parser.add_argument("--requests", type=int, default=20, help="requests per caller")
+    parser.add_argument("--overhead-ms", type=float, default=20.0, help="simulated fixed cost per forward pass")
+    parser.add_argument("--per-item-ms", type=float, default=2.0, help="simulated cost per batched item")
+    parser.add_argument("--real", action="store_true", help="use the QA pipeline instead of the cost model")
+    args = parser.parse_args()
+
+    model = real_model() if args.real else simulated_model(args.overhead_ms, args.per_item_ms)
+    print(f"{args.clients} clients x {args.requests} requests")
+
+    throughput, latencies = run_load(lambda item: model([item])[0], args.clients, args.requests)
+    report("direct", throughput, latencies)
+
+    for max_batch_size in (4, 16):
+        for max_latency_ms in (2, 10, 25):
+            scheduler = BatchScheduler(model, max_batch_size=max_batch_size, max_latency_ms=max_latency_ms)
+            throughput, latencies = run_load(scheduler, args.clients, args.requests)
+            stats = scheduler.stats()
+            report(f"batched B={max_batch_size} T={max_latency_ms}ms", throughput, latencies,
+                   f"   mean batch {stats['mean_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
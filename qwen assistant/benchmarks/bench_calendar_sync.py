@@ -0,0 +1,104 @@
+# Benchmark: local calendar store with sync tokens vs listing events on every query
+# Usage: python benchmarks/bench_calendar_sync.py [--events 600] [--queries 30] [--insert 40]
+# Runs against the in-memory Calendar stand-in in fake_google.py and checks every answer from
+# the store against the answer the API itself gives.
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_sync import CalendarStore  # noqa: E402
+from fake_google import FakeCalendar  # noqa: E402
+
+
+def legacy_upcoming(service, now):
+    """What get_upcoming_events() used to do on every query."""
+    result = service.events().list(calendarId='primary', timeMin=now.isoformat(), maxResults=10,
+                                   singleEvents=True, orderBy='startTime').execute()
+    return [event["id"] for event in result.get("items", [])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the calendar event store against a fake calendar.")
+    parser.add_argument("--events", type=int, default=600, help="events in the calendar at the start")
+    parser.add_argument("--queries", type=int, default=30, help="upcoming-events queries with changes between them")
+    parser.add_argument("--insert", type=int, default=40, help="events added through the batch insert path")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    calendar = FakeCalendar()
+    for i in range(args.events):
+        start = now + datetime.timedelta(hours=rng.randint(-24 * 30, 24 * 60))
+        calendar.create(f"Event {i}", start, start + datetime.timedelta(hours=1))
+
+    store = CalendarStore(lambda: calendar, max_age=0)  # max_age=0: sync on every query to exercise deltas
+    mismatches = 0
+    legacy_trips = store_trips = legacy_items = store_items = 0
+    for query in range(args.queries + 1):
+        if query:
+            for _ in range(3):
+                start = now + datetime.timedelta(hours=rng.randint(1, 72))
+                calendar.create("New event", start, start + datetime.timedelta(minutes=30))
+            calendar.cancel(rng.choice([event["id"] for event in calendar.live_events()]))
+            moved = rng.choice(calendar.live_events())
+            start = now + datetime.timedelta(minutes=rng.randint(5, 600))
+            calendar.update(moved["id"], start={"dateTime": start.isoformat()},
+                            end={"dateTime": (start + datetime.timedelta(hours=1)).isoformat()})
+        trips, items = calendar.round_trips, calendar.items_listed
+        expected = legacy_upcoming(calendar, now)
+        legacy_trips += calendar.round_trips - trips
+        legacy_items += calendar.items_listed - items
+        trips, items = calendar.round_trips, calendar.items_listed
+        got = [event["id"] for event in store.upcoming(limit=10, now=now)]
+        if query:  # The first query pays for the full sync; compare steady state only
+            store_trips += calendar.round_trips - trips
+            store_items += calendar.items_listed - items
+        mismatches += got != expected
+
+    print(f"{args.queries} upcoming-events queries over {len(calendar.live_events())} events, "
+          f"{'all match' if not mismatches else f'{mismatches} MISMATCHES'}")
+    print(f"  re-list every query:      {legacy_trips / (args.queries + 1):.1f} round trips, "
+          f"{legacy_items / (args.queries + 1):.1f} events listed per query")
+    print(f"  sync on every query:      {store_trips / args.queries:.1f} round trips, "
+          f"{store_items / args.queries:.1f} events listed per query (only the changes)")
+    ended = sum(datetime.datetime.fromisoformat(event["end"]["dateTime"]) <= now - store.margin
+                for event in calendar.live_events())
+    held = store.stats()["events"]
+    print(f"  store holds {held} of {len(calendar.live_events())} events ({ended} ended more than "
+          f"{store.margin} ago are never listed or get pruned)")
+    mismatches += held > len(calendar.live_events()) - ended
+    trips = calendar.round_trips
+    began = time.perf_counter()
+    cached = CalendarStore(lambda: calendar, max_age=60)
+    for _ in range(args.queries):
+        cached.upcoming(limit=10, now=now)
+    print(f"  max_age=60 (default):     {calendar.round_trips - trips} round trips for {args.queries} queries, "
+          f"{(time.perf_counter() - began) / args.queries * 1000:.2f}ms per query")
+
+    calendar.expire_sync_tokens()
+    calendar.create("After expiry", now + datetime.timedelta(minutes=1), now + datetime.timedelta(minutes=2))
+    got = [event["id"] for event in store.upcoming(limit=10, now=now)]
+    mismatches += got != legacy_upcoming(calendar, now)
+    print(f"after token expiry: full syncs {store.full_syncs}, incremental syncs {store.incremental_syncs}")
+
+    details = []
+    for i in range(args.insert):
+        start = now + datetime.timedelta(days=1, minutes=15 * i)
+        details.append({"summary": f"Batch {i}", "start": {"dateTime": start.isoformat()},
+                        "end": {"dateTime": (start + datetime.timedelta(minutes=15)).isoformat()}})
+    details.append({"summary": "Broken event"})  # Rejected by the API; the rest still go in
+    trips = calendar.round_trips
+    created = store.insert_many(details)
+    print(f"batch insert: {sum(event is not None for event in created)}/{len(details)} created "
+          f"in {calendar.round_trips - trips} round trips (one per event before)")
+    mismatches += any(event is None for event in created[:-1]) or created[-1] is not None
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
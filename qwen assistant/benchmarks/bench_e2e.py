@@ -0,0 +1,271 @@
+# Benchmark: end-to-end command latency through the assistant's dispatch path, offline
+# Usage: python benchmarks/bench_e2e.py [--rounds 5] [--models auto|real|stub] [--fixtures FILE]
+#        [--latency 0.0] [--save results.json] [--compare baseline.json]
+# Commands from a scripted corpus go through acknowledge_sentiment() and handle_command() as in
+# run_assistant(), with take_command()/speak() replaced by the script, WeatherAPI/NewsAPI/Bing
+# answered by stub_apis.py (optionally replaying recorded fixtures), Gmail and Calendar by the
+# in-memory fakes in fake_google.py, and QA answered from a small local index. Each run happens
+# in a fresh process so startup time and peak RSS are measured in isolation.
+import argparse
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from storage import data_path  # noqa: E402
+from stub_apis import load_fixtures, start_stub_server, stub_environment  # noqa: E402
+
+# (command, scripted replies to follow-up questions)
+CORPUS = [
+    ("what's the time", []),
+    ("what's the weather in delhi", []),
+    ("temperature in delhi", []),  # Served from the weather cache
+    ("weather forecast for mumbai", []),
+    ("show me the news", []),
+    ("search for python asyncio", []),
+    ("battery status", []),
+    ("check my emails", []),
+    ("read my emails", []),
+    ("upcoming events", []),
+    ("add event", ["dentist appointment", "2030-01-15", "10:30", "no"]),
+    ("remind me at 7 pm", ["drink water"]),
+    ("send email", ["friend@example.com", "dinner", "see you at eight"]),
+    ("morning briefing", []),
+    ("who created python", []),
+    ("how tall is mount everest", []),
+    ("model status", []),
+]
+
+# Abstracts for the local QA index, so questions never reach Wikipedia
+PASSAGES = [
+    ("Python (programming language)",
+     "Python is a high-level, general-purpose programming language. It was created by Guido van Rossum "
+     "and first released in 1991. Its design philosophy emphasizes code readability."),
+    ("Mount Everest",
+     "Mount Everest is Earth's highest mountain above sea level, located in the Mahalangur Himal "
+     "sub-range of the Himalayas. Its elevation of 8,848.86 m was most recently established in 2020."),
+    ("Eiffel Tower",
+     "The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris, France. It is named "
+     "after the engineer Gustave Eiffel, whose company designed and built the tower from 1887 to 1889."),
+]
+
+
+# Stand-in models: the pipeline call shapes app.py uses, with trivial outputs
+
+def stub_sentiment(text, **kwargs):
+    return [{"label": "POSITIVE", "score": 0.99}]
+
+
+def stub_qa(inputs, **kwargs):
+    return [{"answer": " ".join(item["context"].split()[:3]), "score": 0.9} for item in inputs]
+
+
+def stub_summarization(texts, **kwargs):
+    return [{"summary_text": text.split(". ")[0]} for text in texts]
+
+
+STUB_MODELS = {"sentiment": stub_sentiment, "qa": stub_qa, "summarization": stub_summarization}
+
+
+def models_available():
+    """Whether real pipelines can be built here (transformers installed)."""
+    try:
+        import transformers  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def fake_services():
+    """A Gmail inbox with unread mail and a calendar with upcoming events."""
+    from fake_google import FakeCalendar, FakeGmail
+    gmail = FakeGmail()
+    for i in range(40):
+        gmail.deliver(f"Sender {i} <sender{i}@example.com>", f"Update number {i}", "Short snippet", unread=i % 3 != 0)
+    calendar = FakeCalendar()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(60):
+        start = now + datetime.timedelta(hours=6 * i - 48)
+        calendar.create(f"Meeting {i}", start, start + datetime.timedelta(hours=1))
+    return gmail, calendar
+
+
+def worker(args):
+    """Import the assistant, run the corpus and print the measurements as JSON."""
+    import_start = time.perf_counter()
+    import app
+    import_time = time.perf_counter() - import_start
+    from retrieval import LocalIndex
+    from telemetry import read_spans
+
+    spoken, replies = [], []
+    first_output = []
+    responses = {}  # command -> what was said in the last round, for checking the run did something
+
+    def speak(text, block=True):
+        if not first_output:
+            first_output.append(time.perf_counter())
+        spoken.append(text)
+
+    app.speak = speak
+    app.listen_for_reply = lambda: replies.pop(0) if replies else ""
+    gmail, calendar = fake_services()
+    app.get_email_service = lambda: gmail
+    app.mail_sync.get_service = lambda: gmail
+    app.get_calendar_service = lambda: calendar
+    app.calendar_store.get_service = lambda: calendar
+    index = LocalIndex()
+    for title, text in PASSAGES:
+        index.add(title, text)
+    index.finalize()
+    app.retriever._index = index
+    app.retriever.offline = True
+    app.retriever.min_local_score = 0.0  # BM25 scores stay low on a three-document index
+    if args.models == "stub":
+        app.registry._models.update(STUB_MODELS)
+    app.WARM_UP_MODELS = args.warm_up
+    app.registry.artifact_dir = args.model_cache  # Reuse exported int8/ONNX models across runs
+
+    start = time.perf_counter()
+    app.start_assistant()
+    startup = {"import": import_time, "start_assistant": time.perf_counter() - start,
+               "ready_after_process_start": app.check_startup_time()}
+
+    latencies = defaultdict(list)  # command -> seconds, first round excluded
+    first_round = {}
+    time_to_speech = defaultdict(list)
+    windows = []  # (command, wall start, wall end) for attributing model spans
+    for round_number in range(args.rounds + 1):
+        for command, script in CORPUS:
+            replies[:] = list(script)
+            del first_output[:]
+            del spoken[:]
+            wall = time.time()
+            began = time.perf_counter()
+            app.acknowledge_sentiment(command)
+            app.handle_command(command)
+            elapsed = time.perf_counter() - began
+            app.sentiment_pool.submit(lambda: None).result()  # Let the side channel finish inside the window
+            windows.append((command, wall, time.time(), round_number))
+            responses[command] = list(spoken)
+            if round_number == 0:
+                first_round[command] = elapsed
+                continue
+            latencies[command].append(elapsed)
+            if first_output:
+                time_to_speech[command].append(first_output[0] - began)
+
+    app.telemetry.close()
+    model_time = defaultdict(float)
+    model_spans = defaultdict(list)
+    spans = [record for record in read_spans([app.TELEMETRY_PATH]) if record["span"] == "model"]
+    for record in spans:
+        model_spans[record["model"]].append(record["duration"])
+        for command, wall_start, wall_end, round_number in windows:
+            if round_number and wall_start <= record["ts"] <= wall_end:
+                model_time[command] += record["duration"]
+                break
+    print(json.dumps({
+        "models": args.models,
+        "startup": startup,
+        "commands": {command: {"latencies": latencies[command], "first_round": first_round[command],
+                               "model_time": model_time[command] / args.rounds,
+                               "time_to_speech": time_to_speech[command], "responses": responses[command]}
+                     for command, _ in CORPUS},
+        "model_spans": model_spans,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+    }))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def report(result, baseline=None):
+    """Print the per-command table and totals, with deltas against a baseline run if given."""
+    def delta(now, before):
+        if before is None or before != before or not before:
+            return ""
+        return f" ({(now - before) / before:+.0%})"
+
+    base_commands = baseline["commands"] if baseline else {}
+    print(f"models: {result['models']}")
+    print(f"{'command':<32}{'p50 ms':>10}{'p95 ms':>10}{'first ms':>10}{'model ms':>10}{'speech ms':>11}")
+    total, base_total = 0.0, 0.0
+    for command, stats in result["commands"].items():
+        p50 = percentile(stats["latencies"], 0.5)
+        total += p50
+        before = base_commands.get(command)
+        base_p50 = percentile(before["latencies"], 0.5) if before else None
+        base_total += base_p50 or 0.0
+        print(f"{command[:31]:<32}{p50 * 1000:>10.1f}{percentile(stats['latencies'], 0.95) * 1000:>10.1f}"
+              f"{stats['first_round'] * 1000:>10.1f}{stats['model_time'] * 1000:>10.1f}"
+              f"{percentile(stats['time_to_speech'], 0.5) * 1000:>11.1f}{delta(p50, base_p50)}")
+    print(f"{'sum of p50':<32}{total * 1000:>10.1f}{delta(total, base_total if baseline else None)}")
+    for model, durations in sorted(result["model_spans"].items()):
+        print(f"model {model}: {len(durations)} calls, p50 {percentile(durations, 0.5) * 1000:.1f}ms, "
+              f"max {max(durations) * 1000:.1f}ms (first call includes loading)")
+    startup = result["startup"]
+    base_startup = baseline["startup"] if baseline else {}
+    print(f"startup: import {startup['import']:.2f}s{delta(startup['import'], base_startup.get('import'))}, "
+          f"start_assistant {startup['start_assistant']:.2f}s, "
+          f"ready {startup['ready_after_process_start']:.2f}s after process start")
+    base_rss = baseline["peak_rss_mb"] if baseline else None
+    print(f"peak RSS: {result['peak_rss_mb']:.0f} MB{delta(result['peak_rss_mb'], base_rss)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time scripted commands through the assistant, offline.")
+    parser.add_argument("--rounds", type=int, default=5, help="measured passes over the corpus after a cold one")
+    parser.add_argument("--models", choices=["auto", "real", "stub"], default="auto",
+                        help="real Hugging Face pipelines (from the local cache), stand-ins, or real if installed")
+    parser.add_argument("--warm-up", action="store_true", help="load the models in the background at startup")
+    parser.add_argument("--fixtures", help="recorded API responses to replay (see stub_apis.py)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated API latency in seconds")
+    parser.add_argument("--save", metavar="FILE", help="write the raw results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="show changes against results saved with --save")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model-cache", default=data_path("model_cache"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    if args.models == "auto":
+        args.models = "real" if models_available() else "stub"
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    httpd, base_url = start_stub_server(latency=args.latency, fixtures=fixtures)
+    env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1", **stub_environment(base_url))
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--models", args.models,
+               "--rounds", str(args.rounds), "--model-cache", args.model_cache]
+    command += ["--warm-up"] if args.warm_up else []
+    with tempfile.TemporaryDirectory() as directory:  # Caches, reminders and telemetry start empty
+        env["ASSISTANT_DATA_DIR"] = directory
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+    httpd.shutdown()
+    if completed.returncode != 0:
+        sys.exit(f"Worker failed:\n{completed.stderr.strip()}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Benchmark: incremental Gmail sync vs listing unread mail on every check
+# Usage: python benchmarks/bench_mail_sync.py [--unread 1200] [--checks 20]
+# Runs against the in-memory Gmail stand-in in fake_google.py and checks the cached unread set
+# against the fake mailbox after every step.
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_google import FakeGmail  # noqa: E402
+from mail_sync import MailSync  # noqa: E402
+
+
+def legacy_unread_count(service):
+    """What check_unread_emails() used to report: the length of the first page of the listing."""
+    results = service.users().messages().list(userId='me', labelIds=['INBOX', 'UNREAD']).execute()
+    return len(results.get('messages', []))
+
+
+def check(label, sync, gmail):
+    """Compare the cache with the mailbox; returns True if they agree."""
+    cached = {message["id"] for message in sync.unread()}
+    ok = cached == gmail.unread_ids()
+    print(f"{label:<34} unread {sync.unread_count():>5} (mailbox {len(gmail.unread_ids()):>5})  "
+          f"round trips {gmail.round_trips:>3}  {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time incremental Gmail sync against a fake mailbox.")
+    parser.add_argument("--unread", type=int, default=1200, help="unread messages in the mailbox at the start")
+    parser.add_argument("--checks", type=int, default=20, help="repeat checks with a few mailbox changes between them")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    gmail = FakeGmail()
+    for i in range(args.unread):
+        gmail.deliver(f"Sender {i % 37} <sender{i % 37}@example.com>", f"Subject {i}")
+    for i in range(300):
+        gmail.deliver(f"Old <old{i}@example.com>", f"Read already {i}", unread=False)
+
+    print(f"legacy check reports {legacy_unread_count(gmail)} unread of {len(gmail.unread_ids())}")
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        sync = MailSync(lambda: gmail, path=os.path.join(directory, "mail_cache.db"))
+        gmail.round_trips = 0
+        sync.sync()
+        ok &= check("initial full sync", sync, gmail)
+
+        gmail.round_trips = 0
+        sync.sync()
+        ok &= check("repeat check, no changes", sync, gmail)
+
+        gmail.round_trips = 0
+        gmail.calls.clear()
+        for _ in range(args.checks):
+            for _ in range(rng.randint(0, 3)):
+                gmail.deliver("Friend <friend@example.com>", "New message")
+            for message_id in rng.sample(sorted(gmail.unread_ids()), 2):
+                gmail.mark_read(message_id)
+            gmail.archive(rng.choice(sorted(gmail.unread_ids())))
+            gmail.delete(rng.choice(sorted(gmail.mailbox)))
+            sync.sync()
+        ok &= check(f"{args.checks} checks with changes", sync, gmail)
+        print(f"  {gmail.round_trips / args.checks:.1f} round trips per check, calls: {dict(gmail.calls)}")
+
+        gmail.deliver("Late <late@example.com>", "Before expiry")
+        gmail.expire_history()
+        gmail.round_trips = 0
+        sync.sync()
+        ok &= check("check after history expired", sync, gmail)
+        print(f"  full syncs {sync.full_syncs}, incremental syncs {sync.incremental_syncs}")
+
+        newest = sync.unread(limit=1)[0]
+        print(f"newest unread: {newest['sender']} - {newest['subject']}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
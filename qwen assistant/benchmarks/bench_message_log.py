@@ -0,0 +1,88 @@
+# Benchmark: message history lookups from the SQLite journal vs scanning PyWhatKit_DB.txt
+# Usage: python benchmarks/bench_message_log.py [--messages 100000] [--contacts 500] [--lookups 200]
+# Writes a synthetic pywhatkit log, imports it, and checks every "last message to X" answer
+# from the journal against a full scan of the text file.
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from message_log import MessageLog, parse_pywhatkit_log  # noqa: E402
+
+
+def write_log(path, messages, contacts, rng):
+    """Write messages pywhatkit-style entries, oldest first, one minute apart."""
+    start = time.time() - messages * 60
+    numbers = [f"+91{rng.randrange(10 ** 9, 10 ** 10)}" for _ in range(contacts)]
+    with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+        for i in range(messages):
+            when = time.localtime(start + i * 60)
+            f.write(f"Date: {when.tm_mday}/{when.tm_mon}/{when.tm_year}\nTime: {when.tm_hour}:{when.tm_min:02d}\n"
+                    f"Phone Number: {rng.choice(numbers)}\nMessage: message number {i}\n--------------------\n")
+    return numbers
+
+
+def scan_last(path, number=None):
+    """What answering from the flat file takes: read and parse all of it."""
+    with open(path, encoding="utf-8") as f:
+        last = None
+        for sent, phone, message in parse_pywhatkit_log(f.read()):
+            if number is None or phone == number:
+                last = (phone, message)
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time message history lookups.")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--contacts", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "PyWhatKit_DB.txt")
+        numbers = write_log(text_path, args.messages, args.contacts, rng)
+        log = MessageLog(os.path.join(directory, "messages.db"), max_entries=args.messages * 2)
+        began = time.perf_counter()
+        imported = log.import_pywhatkit(text_path, rotate_bytes=float("inf"))
+        print(f"imported {imported} entries ({os.path.getsize(text_path) / 1024 / 1024:.1f} MiB) "
+              f"in {time.perf_counter() - began:.1f}s; re-import added {log.import_pywhatkit(text_path)}")
+
+        checked = rng.sample(numbers, min(len(numbers), 5)) + [None]
+        began = time.perf_counter()
+        expected = {number: scan_last(text_path, number) for number in checked}
+        scan_time = (time.perf_counter() - began) / len(checked)
+        mismatches = 0
+        for number, answer in expected.items():
+            sent = log.last(number)
+            mismatches += answer != ((sent.contact, sent.message) if sent else None)
+
+        began = time.perf_counter()
+        for _ in range(args.lookups):
+            log.last(rng.choice(numbers))
+            log.last()
+        lookup_time = (time.perf_counter() - began) / (2 * args.lookups)
+        print(f"last message lookups: scan {scan_time * 1000:.0f}ms, journal {lookup_time * 1e6:.0f}us "
+              f"({'all match' if not mismatches else f'{mismatches} MISMATCHES'})")
+
+        suffix = numbers[0][-4:]
+        found = log.find_contact(f"{suffix[:2]} {suffix[2:]}")
+        print(f"find_contact by last digits: {found} (expected a number ending in {suffix})")
+        mismatches += found is None or not found.endswith(suffix)
+
+        log.max_entries = args.messages // 2
+        removed = log.compact()
+        missing = sum(log.last(number) is None for number in numbers)
+        print(f"compacted to {log.stats()['messages']} messages ({removed} removed); "
+              f"contacts that lost their last message: {missing}")
+        mismatches += missing
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
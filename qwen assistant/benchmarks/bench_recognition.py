@@ -0,0 +1,157 @@
+# Benchmark: VAD endpointing and recognizer latency on WAV fixtures (no microphone needed)
+# Usage: python benchmarks/bench_recognition.py [--fixtures DIR] [--backend null vosk whisper google]
+#        [--vosk-model PATH] [--whisper-model base.en]
+# Fixtures are 16 kHz 16-bit mono WAV recordings, each with an optional .txt transcript next to
+# it for word error rate. Without a fixtures directory, synthetic clips (noise with bursts of
+# voice-band tones) are generated so the VAD and endpointing path can still be measured.
+import argparse
+import glob
+import math
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognition import SAMPLE_RATE, EnergyVAD, StreamingListener, WavSource, make_recognizer, write_wav  # noqa: E402
+
+LEGACY_PAUSE_THRESHOLD = 1.0  # Seconds of silence take_command() used to wait for
+
+
+class NullRecognizer:
+    """Recognizes nothing; measures segmentation and endpointing on their own."""
+
+    streaming = False
+
+    def start(self):
+        pass
+
+    def feed(self, frame):
+        return None
+
+    def finish(self):
+        return ""
+
+
+def synthetic_clip(rng, bursts):
+    """Return PCM for low noise with `bursts` half-to-two-second voice-like tone bursts separated by pauses."""
+    samples = []
+
+    def add(seconds, voiced):
+        pitch = rng.uniform(110, 220)
+        for n in range(int(seconds * SAMPLE_RATE)):
+            value = rng.gauss(0, 60)
+            if voiced:
+                envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * n / SAMPLE_RATE)  # Syllable-rate modulation
+                value += 4000 * envelope * sum(math.sin(2 * math.pi * pitch * k * n / SAMPLE_RATE) / k
+                                               for k in (1, 2, 3))
+            samples.append(max(-32768, min(32767, int(value))))
+
+    add(0.8, False)
+    for _ in range(bursts):
+        add(rng.uniform(0.5, 2.0), True)
+        add(rng.uniform(1.2, 2.0), False)
+    return b"".join(sample.to_bytes(2, "little", signed=True) for sample in samples)
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(distances[j] + 1, distances[j - 1] + 1,
+                                                       previous + (ref_word != hyp_word))
+    return distances[-1] / max(1, len(ref))
+
+
+def build_recognizer(name, args):
+    if name == "null":
+        return NullRecognizer()
+    if name == "vosk":
+        return make_recognizer("vosk", model_path=args.vosk_model)
+    if name == "whisper":
+        return make_recognizer("whisper", model=args.whisper_model)
+    return make_recognizer(name)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def run_backend(name, recognizer, fixtures, silence_ms):
+    """Segment and transcribe every fixture; print latency and accuracy figures."""
+    endpoint_delays, recognize_times, first_partials, errors = [], [], [], []
+    utterances = 0
+    for path in fixtures:
+        listener = StreamingListener(WavSource(path), EnergyVAD(), recognizer, silence_ms=silence_ms)
+        texts = []
+        while True:
+            text = listener.listen(drain=False)
+            timings = listener.last_timings
+            if "endpoint" not in timings:
+                break  # End of the file without further speech
+            utterances += 1
+            texts.append(text)
+            endpoint_delays.append(timings["endpoint"] - timings["speech_end"])
+            recognize_times.append(timings["recognize"])
+            if "first_partial" in timings:
+                first_partials.append(timings["first_partial"] - timings["speech_start"])
+        listener.close()
+        transcript = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(transcript):
+            with open(transcript, encoding="utf-8") as f:
+                errors.append(word_error_rate(f.read(), " ".join(texts)))
+
+    responses = [delay + recognize for delay, recognize in zip(endpoint_delays, recognize_times)]
+    line = (f"{name:<8} {utterances:>4} utterances  endpoint p50 {percentile(endpoint_delays, 0.5) * 1000:>5.0f}ms  "
+            f"recognize p50 {percentile(recognize_times, 0.5) * 1000:>6.0f}ms p95 "
+            f"{percentile(recognize_times, 0.95) * 1000:>6.0f}ms  "
+            f"response p50 {percentile(responses, 0.5) * 1000:>6.0f}ms")
+    if first_partials:
+        line += f"  first partial {percentile(first_partials, 0.5) * 1000:.0f}ms after speech start"
+    if errors:
+        line += f"  WER {sum(errors) / len(errors):.1%}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VAD endpointing and recognizer latency on WAV fixtures.")
+    parser.add_argument("--fixtures", help="directory of 16 kHz mono WAV files (default: generate synthetic clips)")
+    parser.add_argument("--backend", nargs="+", default=["null", "vosk", "whisper"],
+                        help="recognizers to compare: null, google, vosk, whisper")
+    parser.add_argument("--vosk-model", default="vosk-model-small-en-us-0.15")
+    parser.add_argument("--whisper-model", default="base.en")
+    parser.add_argument("--silence-ms", type=int, default=500, help="silence that ends an utterance")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.fixtures:
+            fixtures = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+        else:
+            rng = random.Random(0)
+            fixtures = []
+            for i in range(4):
+                path = os.path.join(directory, f"synthetic-{i}.wav")
+                write_wav(path, synthetic_clip(rng, bursts=3))
+                fixtures.append(path)
+            print(f"Generated {len(fixtures)} synthetic clips (no transcripts, so no WER)")
+        if not fixtures:
+            sys.exit("No WAV fixtures found.")
+
+        print(f"silence_ms={args.silence_ms}; take_command() used to wait {LEGACY_PAUSE_THRESHOLD * 1000:.0f}ms "
+              "of silence and then upload the clip")
+        for name in args.backend:
+            try:
+                recognizer = build_recognizer(name, args)
+            except Exception as e:  # Missing package or model: skip this backend
+                print(f"{name:<8} unavailable: {e}")
+                continue
+            run_backend(name, recognizer, fixtures, args.silence_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark: reminder scheduler with thousands of pending reminders
+# Usage: python benchmarks/bench_reminders.py [--pending 10000] [--firing 200]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminders import ReminderScheduler  # noqa: E402
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure reminder scheduling cost and delivery lateness.")
+    parser.add_argument("--pending", type=int, default=10000, help="far-future reminders to keep pending")
+    parser.add_argument("--firing", type=int, default=200, help="reminders due within the next two seconds")
+    args = parser.parse_args()
+
+    lateness = []
+    done = threading.Event()
+
+    def deliver(reminder):
+        lateness.append(time.time() - reminder.due)
+        if len(lateness) == args.firing:
+            done.set()
+
+    with tempfile.TemporaryDirectory() as directory:
+        scheduler = ReminderScheduler(deliver, path=os.path.join(directory, "reminders.db"))
+        scheduler.start()
+        now = time.time()
+        start = time.perf_counter()
+        for i in range(args.pending):
+            scheduler.add(now + 3600 + i, f"pending reminder {i}")
+        add_time = time.perf_counter() - start
+        print(f"add: {add_time / args.pending * 1e6:.0f}us per reminder ({args.pending} reminders)")
+
+        start = time.perf_counter()
+        listed = scheduler.list()
+        print(f"list: {(time.perf_counter() - start) * 1000:.1f}ms for {len(listed)} reminders")
+
+        start = time.perf_counter()
+        for reminder in listed[:1000]:
+            scheduler.cancel(reminder.id)
+        print(f"cancel: {(time.perf_counter() - start) / min(1000, len(listed)) * 1e6:.0f}us per reminder")
+
+        now = time.time()
+        for i in range(args.firing):
+            scheduler.add(now + 0.5 + 1.5 * i / args.firing, f"due reminder {i}")
+        done.wait(timeout=10)
+        print(f"delivered {len(lateness)}/{args.firing}: lateness p50 {percentile(lateness, 0.5) * 1000:.1f}ms, "
+              f"p99 {percentile(lateness, 0.99) * 1000:.1f}ms, threads alive {threading.active_count()}")
+
+        start = time.perf_counter()
+        reloaded = ReminderScheduler(deliver, path=scheduler.path)
+        reloaded.start()
+        print(f"reload: {(time.perf_counter() - start) * 1000:.0f}ms for {reloaded.stats()['pending']} reminders")
+
+
+if __name__ == "__main__":
+    main()
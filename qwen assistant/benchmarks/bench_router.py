@@ -0,0 +1,114 @@
+# Benchmark: intent router vs the original substring if/elif chain
+# Usage: python benchmarks/bench_router.py [--repeat N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+# Sample commands and the intent they should reach (None means the QA fallback)
+CORPUS = [
+    ("what's the time", "time"),
+    ("tell me the time please", "time"),
+    ("play despacito", "play"),
+    ("play shape of you on youtube", "play"),
+    ("play music", "music_control"),
+    ("pause music", "music_control"),
+    ("skip music", "music_control"),
+    ("what's the weather", "weather"),
+    ("what's the weather in new york today", "weather"),
+    ("is it raining in delhi", "weather"),
+    ("weather forecast", "weather_forecast"),
+    ("weather forecast for london", "weather_forecast"),
+    ("morning briefing", "briefing"),
+    ("show me the news", "news"),
+    ("read the headlines", "news"),
+    ("battery status", "battery"),
+    ("how much charge is left", "battery"),
+    ("set reminder", "set_reminder"),
+    ("set a reminder at 5:30 pm", "set_reminder"),
+    ("send whatsapp message", "whatsapp"),
+    ("open youtube", "open"),
+    ("search the web for python tutorials", "search"),
+    ("add event", "add_event"),
+    ("schedule a meeting with the team", "add_event"),
+    ("upcoming events", "upcoming_events"),
+    ("send email", "send_email"),
+    ("check emails", "check_emails"),
+    ("any new mail", "check_emails"),
+    ("model status", "model_status"),
+    ("exit", "exit"),
+    ("who is the prime minister of india", None),
+    ("what is the capital of france", None),
+    ("how tall is mount everest", None),
+    ("when was the eiffel tower built", None),
+    ("sometimes i wonder about black holes", None),
+    ("display the history of the roman empire", None),
+]
+
+# The original run_assistant() chain, in its original order
+LEGACY_CHAIN = [
+    (["time"], "time"),
+    (["play"], "play"),
+    (["weather"], "weather"),
+    (["weather forecast"], "weather_forecast"),
+    (["news"], "news"),
+    (["battery", "battery status"], "battery"),
+    (["set reminder"], "set_reminder"),
+    (["send whatsapp", "whatsapp message"], "whatsapp"),
+    (["open"], "open"),
+    (["search"], "search"),
+    (["add event"], "add_event"),
+    (["upcoming events"], "upcoming_events"),
+    (["send email"], "send_email"),
+    (["check emails"], "check_emails"),
+    (["play music", "pause music", "skip music"], "music_control"),
+    (["exit", "stop"], "exit"),
+]
+
+
+def legacy_route(command):
+    """Route like the original if/elif chain."""
+    for keywords, name in LEGACY_CHAIN:
+        if any(keyword in command for keyword in keywords):
+            return name
+    return None
+
+
+def router_route(command):
+    """Route with the compiled intent router."""
+    match = app.router.match(command)
+    return match.intent.name if match else None
+
+
+def evaluate(route, repeat):
+    """Return (accuracy, mistakes, microseconds per command)."""
+    mistakes = [(command, expected, route(command)) for command, expected in CORPUS
+                if route(command) != expected]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command, _ in CORPUS:
+            route(command)
+    elapsed = time.perf_counter() - start
+    accuracy = 1 - len(mistakes) / len(CORPUS)
+    return accuracy, mistakes, elapsed / (repeat * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the intent router with the legacy if/elif chain.")
+    parser.add_argument("--repeat", type=int, default=2000, help="passes over the corpus for timing")
+    args = parser.parse_args()
+
+    print(f"Corpus: {len(CORPUS)} commands, {len(app.router.intents)} intents")
+    for label, route in (("Legacy chain", legacy_route), ("Intent router", router_route)):
+        accuracy, mistakes, per_command = evaluate(route, args.repeat)
+        print(f"{label}: {accuracy:.0%} correct, {per_command:.1f}us per command")
+        for command, expected, got in mistakes:
+            print(f"    {command!r}: expected {expected}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
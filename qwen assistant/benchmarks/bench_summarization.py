@@ -0,0 +1,93 @@
+# Benchmark: per-item vs batched summarization
+# Usage: python benchmarks/bench_summarization.py [--repeat N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from cache import SummaryCache  # noqa: E402
+from models import registry  # noqa: E402
+
+# News-style descriptions of the length NewsAPI usually returns, plus the edge cases get_news() has to handle
+SAMPLE_TEXTS = [
+    "The city council approved a new budget on Tuesday that increases spending on public transport, "
+    "road repairs and school maintenance, while postponing a planned stadium renovation until next year "
+    "because of rising construction costs and delays in securing federal matching funds.",
+    "Scientists at the national observatory reported the discovery of a small asteroid that will pass "
+    "between the Earth and the Moon next month. They stressed that there is no risk of impact and invited "
+    "amateur astronomers to help track the object as it moves across the night sky.",
+    "Shares of major technology companies rose sharply after the central bank signalled that it would keep "
+    "interest rates unchanged for the rest of the quarter, easing investor concerns about borrowing costs "
+    "and boosting expectations for stronger earnings in the coming months.",
+    "Heavy monsoon rain caused flooding in several low-lying districts over the weekend, forcing schools to "
+    "close and disrupting train services. Officials said relief camps had been set up and that water levels "
+    "were expected to recede once the rain eases later in the week.",
+    "The national cricket team announced its squad for the upcoming tour, recalling two experienced fast "
+    "bowlers and naming an uncapped wicketkeeper. The selectors said the mix of youth and experience was "
+    "chosen to cope with the conditions expected during the five-match series.",
+    None,
+    "Short update with no need for a summary.",
+]
+
+
+def time_call(fn):
+    """Return the wall time of fn() in seconds."""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def per_item(texts):
+    """Summarize each text with its own forward pass, the way get_news() used to.
+
+    Texts summarize_texts() would pass through unchanged (missing or already short) are
+    skipped here too, so both modes run the model on the same inputs.
+    """
+    summarizer = registry.get("summarization")
+    summaries = []
+    for text in texts:
+        text = (text or "").strip()
+        if len(text.split()) > app.SUMMARY_MIN_LENGTH:
+            summaries.append(summarizer(text, max_length=app.SUMMARY_MAX_LENGTH,
+                                        min_length=app.SUMMARY_MIN_LENGTH, do_sample=False)[0]['summary_text'])
+        else:
+            summaries.append(text)
+    return summaries
+
+
+def batched(texts, cache_path):
+    """Summarize through summarize_texts() with a new, empty summary cache at cache_path."""
+    app.summary_cache = SummaryCache(cache_path)
+    return app.summarize_texts(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-item and batched summarization.")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mode")
+    args = parser.parse_args()
+
+    load_time = time_call(lambda: registry.get("summarization"))
+    print(f"Model load: {load_time:.2f}s")
+    per_item(SAMPLE_TEXTS[:1])  # Warm-up pass so the first timed run isn't penalized
+
+    per_item_times = [time_call(lambda: per_item(SAMPLE_TEXTS)) for _ in range(args.repeat)]
+    with tempfile.TemporaryDirectory() as directory:  # Never touch the user's summary cache
+        batched_times = [time_call(lambda: batched(SAMPLE_TEXTS, os.path.join(directory, f"run-{run}.db")))
+                         for run in range(args.repeat)]
+        cached_times = [time_call(lambda: app.summarize_texts(SAMPLE_TEXTS)) for _ in range(args.repeat)]
+    best_per_item = min(per_item_times)
+    best_batched = min(batched_times)
+    short = sum(1 for t in SAMPLE_TEXTS if len((t or "").split()) <= app.SUMMARY_MIN_LENGTH)
+    print(f"Inputs: {len(SAMPLE_TEXTS)} ({short} missing or too short to summarize)")
+    print(f"Per-item: best {best_per_item:.2f}s, mean {sum(per_item_times) / len(per_item_times):.2f}s")
+    print(f"Batched:  best {best_batched:.2f}s, mean {sum(batched_times) / len(batched_times):.2f}s")
+    print(f"Cached:   best {min(cached_times) * 1000:.1f}ms")
+    print(f"Speed-up: {best_per_item / best_batched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# In-memory stand-ins for the Gmail and Calendar API client service objects
+# They mimic the googleapiclient call shape (service.users().messages().list(...).execute(),
+# new_batch_http_request()) closely enough for the sync code, and count HTTP round trips.
+import datetime
+import itertools
+import json
+from collections import Counter
+
+from googleapiclient.errors import HttpError
+
+
+class FakeResponse(dict):
+    """The bits of an httplib2 response that HttpError looks at."""
+
+    def __init__(self, status, reason):
+        super().__init__(status=str(status))
+        self.status = status
+        self.reason = reason
+
+
+def http_error(status, reason):
+    """Build the HttpError the real client raises for an error response."""
+    content = json.dumps({"error": {"code": status, "message": reason}}).encode("utf-8")
+    return HttpError(FakeResponse(status, reason), content)
+
+
+class FakeRequest:
+    """A pending API call; execute() runs it as one HTTP round trip."""
+
+    def __init__(self, service, name, run):
+        self.service = service
+        self.name = name
+        self.run = run
+
+    def execute(self):
+        self.service.round_trips += 1
+        self.service.calls[self.name] += 1
+        return self.run()
+
+
+class FakeBatch:
+    """Collects requests and runs them in one round trip, like BatchHttpRequest."""
+
+    def __init__(self, service, callback=None, limit=100):
+        self.service = service
+        self.callback = callback
+        self.limit = limit
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        if len(self.requests) >= self.limit:
+            raise ValueError(f"Exceeded the maximum of {self.limit} calls in a single batch")
+        request_id = request_id or str(len(self.requests) + 1)
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self):
+        self.service.round_trips += 1
+        self.service.calls["batch"] += 1
+        for request_id, request, callback in self.requests:
+            self.service.calls[request.name] += 1
+            try:
+                response, exception = request.run(), None
+            except HttpError as e:
+                response, exception = None, e
+            if callback is not None:
+                callback(request_id, response, exception)
+
+
+class FakeGmail:
+    """A mailbox with a history log, served through a Gmail-like service object."""
+
+    def __init__(self):
+        self.mailbox = {}  # id -> {"labelIds", "headers", "snippet", "internalDate"}
+        self.history = []  # (history_id, record), oldest first
+        self.history_id = 1000
+        self.oldest_history_id = self.history_id  # Older startHistoryIds get a 404, like expired history
+        self.sent = []
+        self.round_trips = 0
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+
+    # Mailbox changes, as if made by other clients
+
+    def deliver(self, sender, subject, snippet="", unread=True):
+        """Add a message to the inbox and return its id."""
+        message_id = f"m{next(self._ids):06d}"
+        labels = ["INBOX", "UNREAD"] if unread else ["INBOX"]
+        self.mailbox[message_id] = {"labelIds": labels, "snippet": snippet, "internalDate": next(self._ids),
+                                    "headers": {"From": sender, "Subject": subject, "Date": "Mon, 1 Jan 2024"}}
+        self._record("messagesAdded", message_id)
+        return message_id
+
+    def mark_read(self, message_id):
+        """Remove the UNREAD label from a message."""
+        self.mailbox[message_id]["labelIds"].remove("UNREAD")
+        self._record("labelsRemoved", message_id, labelIds=["UNREAD"])
+
+    def archive(self, message_id):
+        """Remove a message from the inbox."""
+        self.mailbox[message_id]["labelIds"].remove("INBOX")
+        self._record("labelsRemoved", message_id, labelIds=["INBOX"])
+
+    def delete(self, message_id):
+        """Delete a message permanently."""
+        del self.mailbox[message_id]
+        self._record("messagesDeleted", message_id)
+
+    def expire_history(self):
+        """Forget the history log, so incremental syncs from before now fail with 404."""
+        self.history.clear()
+        self.oldest_history_id = self.history_id
+
+    def unread_ids(self):
+        """Return the ids the server considers unread in the inbox."""
+        return {i for i, message in self.mailbox.items() if {"INBOX", "UNREAD"} <= set(message["labelIds"])}
+
+    def _record(self, kind, message_id, **extra):
+        self.history_id += 1
+        message = {"id": message_id, "threadId": message_id}
+        if message_id in self.mailbox:
+            message["labelIds"] = list(self.mailbox[message_id]["labelIds"])
+        record = {"id": str(self.history_id), "messages": [message], kind: [dict(message=message, **extra)]}
+        self.history.append((self.history_id, record))
+
+    # Service object
+
+    def users(self):
+        return _GmailUsers(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+
+class _GmailUsers:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def getProfile(self, userId):
+        return FakeRequest(self.gmail, "users.getProfile", lambda: {
+            "emailAddress": "me@example.com", "messagesTotal": len(self.gmail.mailbox),
+            "historyId": str(self.gmail.history_id),
+        })
+
+    def messages(self):
+        return _GmailMessages(self.gmail)
+
+    def history(self):
+        return _GmailHistory(self.gmail)
+
+
+class _GmailMessages:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def list(self, userId, labelIds=None, maxResults=100, pageToken=None, q=None):
+        def run():
+            wanted = set(labelIds or [])
+            ids = sorted((i for i, message in self.gmail.mailbox.items() if wanted <= set(message["labelIds"])),
+                         key=lambda i: -self.gmail.mailbox[i]["internalDate"])
+            start = int(pageToken or 0)
+            end = start + min(maxResults, 500)
+            response = {"messages": [{"id": i, "threadId": i} for i in ids[start:end]],
+                        "resultSizeEstimate": len(ids)}
+            if end < len(ids):
+                response["nextPageToken"] = str(end)
+            return response
+        return FakeRequest(self.gmail, "messages.list", run)
+
+    def get(self, userId, id, format="full", metadataHeaders=None):
+        def run():
+            message = self.gmail.mailbox.get(id)
+            if message is None:
+                raise http_error(404, "Requested entity was not found.")
+            headers = [{"name": name, "value": value} for name, value in message["headers"].items()
+                       if metadataHeaders is None or name in metadataHeaders]
+            return {"id": id, "threadId": id, "labelIds": list(message["labelIds"]), "snippet": message["snippet"],
+                    "internalDate": str(message["internalDate"]), "payload": {"headers": headers}}
+        return FakeRequest(self.gmail, "messages.get", run)
+
+    def send(self, userId, body):
+        def run():
+            self.gmail.sent.append(body)
+            return {"id": f"s{len(self.gmail.sent):06d}", "labelIds": ["SENT"]}
+        return FakeRequest(self.gmail, "messages.send", run)
+
+
+class _GmailHistory:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def list(self, userId, startHistoryId, historyTypes=None, pageToken=None, maxResults=100):
+        def run():
+            start_id = int(startHistoryId)
+            if start_id < self.gmail.oldest_history_id:
+                raise http_error(404, "Requested entity was not found.")
+            wanted = set(historyTypes or ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"])
+            keys = {"messageAdded": "messagesAdded", "messageDeleted": "messagesDeleted",
+                    "labelAdded": "labelsAdded", "labelRemoved": "labelsRemoved"}
+            records = [record for history_id, record in self.gmail.history
+                       if history_id > start_id and any(keys[kind] in record for kind in wanted)]
+            start = int(pageToken or 0)
+            end = start + min(maxResults, 500)
+            response = {"history": records[start:end], "historyId": str(self.gmail.history_id)}
+            if end < len(records):
+                response["nextPageToken"] = str(end)
+            return response
+        return FakeRequest(self.gmail, "history.list", run)
+
+
+class FakeCalendar:
+    """A calendar with change sequence numbers, served through a Calendar-like service object."""
+
+    def __init__(self):
+        self.calendar = {}  # id -> event resource, including cancelled ones
+        self.changed = {}  # id -> sequence number of its last change
+        self.sequence = 0
+        self.oldest_sync_token = 0  # Older sync tokens get a 410, like expired tokens
+        self.items_listed = 0  # Events returned by events.list(), a proxy for bytes on the wire
+        self.round_trips = 0
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+
+    # Calendar changes, as if made by other clients
+
+    def create(self, summary, start, end):
+        """Add an event with aware datetimes start and end; returns the event."""
+        event = {"id": f"e{next(self._ids):06d}", "status": "confirmed", "summary": summary,
+                 "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}}
+        self._touch(event)
+        return event
+
+    def update(self, event_id, **fields):
+        """Change fields of an event."""
+        self.calendar[event_id].update(fields)
+        self._touch(self.calendar[event_id])
+
+    def cancel(self, event_id):
+        """Delete an event; sync listings report it as cancelled."""
+        self.calendar[event_id]["status"] = "cancelled"
+        self._touch(self.calendar[event_id])
+
+    def expire_sync_tokens(self):
+        """Invalidate every sync token handed out so far."""
+        self.oldest_sync_token = self.sequence + 1
+
+    def live_events(self):
+        """Return the events that haven't been cancelled."""
+        return [event for event in self.calendar.values() if event["status"] != "cancelled"]
+
+    def _touch(self, event):
+        self.sequence += 1
+        self.calendar[event["id"]] = event
+        self.changed[event["id"]] = self.sequence
+
+    # Service object
+
+    def events(self):
+        return _CalendarEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback, limit=1000)
+
+
+class _CalendarEvents:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def list(self, calendarId, syncToken=None, pageToken=None, maxResults=250, timeMin=None, orderBy=None,
+             singleEvents=False, showDeleted=False):
+        def run():
+            fake = self.calendar
+            if syncToken is not None:
+                if timeMin is not None or orderBy is not None:
+                    raise http_error(400, "timeMin and orderBy can't be combined with syncToken")
+                if int(syncToken) < fake.oldest_sync_token:
+                    raise http_error(410, "Sync token is no longer valid, a full sync is required.")
+                events = [event for event_id, event in fake.calendar.items() if fake.changed[event_id] > int(syncToken)]
+            else:
+                events = [event for event in fake.calendar.values() if showDeleted or event["status"] != "cancelled"]
+                if timeMin is not None:
+                    start = datetime.datetime.fromisoformat(timeMin.replace("Z", "+00:00"))
+                    events = [event for event in events
+                              if datetime.datetime.fromisoformat(event["end"]["dateTime"]) > start]
+            if orderBy == "startTime":
+                events.sort(key=lambda event: datetime.datetime.fromisoformat(event["start"]["dateTime"]))
+            start = int(pageToken or 0)
+            end = start + min(maxResults, 2500)
+            response = {"items": [dict(event) for event in events[start:end]]}
+            fake.items_listed += len(response["items"])
+            if end < len(events):
+                response["nextPageToken"] = str(end)
+            else:
+                response["nextSyncToken"] = str(fake.sequence)
+            return response
+        return FakeRequest(self.calendar, "events.list", run)
+
+    def insert(self, calendarId, body):
+        def run():
+            if "summary" not in body or "start" not in body or "end" not in body:
+                raise http_error(400, "Missing summary, start or end.")
+            event = dict(body, id=f"e{next(self.calendar._ids):06d}", status="confirmed")
+            self.calendar._touch(event)
+            return dict(event)
+        return FakeRequest(self.calendar, "events.insert", run)
@@ -0,0 +1,120 @@
+# Load test: many concurrent clients against server.py, with the external APIs stubbed locally
+# Usage: python benchmarks/load_test.py [--clients 16] [--requests 400] [--endpoints weather news ask]
+import argparse
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_apis import start_stub_server, stub_environment  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (method, path, json body)
+SCENARIOS = {
+    "weather": ("GET", "/api/weather?city={city}", None),
+    "forecast": ("GET", "/api/forecast?city={city}", None),
+    "news": ("GET", "/api/news", None),
+    "search": ("GET", "/api/search?q={topic}", None),
+    "ask": ("POST", "/api/ask", {"question": "who created the {topic} programming language"}),
+    "command": ("POST", "/api/command", {"command": "what's the weather in {city}"}),
+}
+CITIES = ["hyderabad", "delhi", "mumbai", "chennai", "bengaluru", "kolkata", "pune", "jaipur"]
+TOPICS = ["python", "java", "rust", "go", "kotlin"]
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (0-1) of the sorted values."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def wait_for_server(session, base_url, timeout):
+    """Poll /api/health until the server answers."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if session.get(f"{base_url}/api/health", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def one_request(session, base_url, name):
+    """Send one request for scenario name and return (name, seconds, ok)."""
+    method, path, body = SCENARIOS[name]
+    values = {"city": random.choice(CITIES), "topic": random.choice(TOPICS)}
+    if body is not None:
+        body = {key: value.format(**values) for key, value in body.items()}
+    start = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path.format(**values), json=body, timeout=120)
+        ok = response.ok
+    except requests.RequestException:
+        ok = False
+    return name, time.perf_counter() - start, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test server.py against stubbed external APIs.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--endpoints", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--api-latency", type=float, default=0.05, help="stub API response delay in seconds")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(latency=args.api_latency)
+    token = secrets.token_urlsafe(32)
+    data_dir = tempfile.TemporaryDirectory()  # Caches, reminders and telemetry start empty
+    env = dict(os.environ, ASSISTANT_API_TOKEN=token, ASSISTANT_DATA_DIR=data_dir.name, **stub_environment(stub_url))
+    process = subprocess.Popen([sys.executable, "server.py", "--port", str(args.port)], cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.clients))
+    try:
+        if not wait_for_server(session, base_url, timeout=120):
+            print("Server did not start.")
+            return 1
+        for name in args.endpoints:  # Warm-up: load models and fill connection pools
+            one_request(session, base_url, name)
+        plan = [random.choice(args.endpoints) for _ in range(args.requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(lambda name: one_request(session, base_url, name), plan))
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        stub.shutdown()
+        data_dir.cleanup()
+
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for name, seconds, ok in results:
+        by_endpoint[name].append(seconds)
+        errors[name] += not ok
+    print(f"{len(results)} requests from {args.clients} clients in {elapsed:.1f}s "
+          f"({len(results) / elapsed:.1f} req/s)")
+    print(f"{'endpoint':<10}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for name, latencies in sorted(by_endpoint.items()):
+        print(f"{name:<10}{len(latencies):>7}{percentile(latencies, 0.5) * 1000:>8.0f}ms"
+              f"{percentile(latencies, 0.95) * 1000:>8.0f}ms{percentile(latencies, 0.99) * 1000:>8.0f}ms"
+              f"{errors[name]:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# Local stand-ins for WeatherAPI, NewsAPI, Bing Search and the Wikipedia (MediaWiki) API
+# Usage: python benchmarks/stub_apis.py [--port 8765] [--latency 0.05] [--fixtures FILE] [--dump FILE]
+# Point the assistant at it with the environment printed on startup.
+# A fixture file maps endpoint names (current.json, forecast.json, top-headlines, search, api.php) to
+# recorded JSON responses that are replayed instead of the built-in ones; --dump writes the
+# built-in responses in that format as a starting point.
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ARTICLE_TEXT = (
+    "Officials announced on Monday a set of measures intended to ease traffic congestion in the city centre, "
+    "including new bus lanes, extended metro hours and a pilot scheme for shared bicycles. The plan will be "
+    "reviewed after six months, when planners expect to have enough data to decide whether to expand it."
+)
+
+
+def current_weather(city):
+    """Return a WeatherAPI-style current-conditions block."""
+    return {"condition": {"text": "Partly cloudy"}, "temp_c": 31.0, "feelslike_c": 34.2, "humidity": 58,
+            "last_updated": time.strftime("%Y-%m-%d %H:%M")}
+
+
+def weather_response(endpoint, query):
+    """Build a current.json or forecast.json response."""
+    city = query.get("q", ["Hyderabad"])[0]
+    data = {"location": {"name": city.title()}, "current": current_weather(city)}
+    if endpoint == "forecast.json":
+        days = int(query.get("days", ["3"])[0])
+        data["forecast"] = {"forecastday": [
+            {"date": f"2025-04-{20 + day:02d}",
+             "day": {"condition": {"text": "Sunny"}, "maxtemp_c": 35.0 + day, "mintemp_c": 24.0, "avgtemp_c": 29.5}}
+            for day in range(days)
+        ]}
+    return data
+
+
+def news_response(query):
+    """Build a NewsAPI top-headlines response."""
+    return {"status": "ok", "totalResults": 5, "articles": [
+        {"title": f"Headline number {i + 1}", "description": ARTICLE_TEXT if i != 4 else None}
+        for i in range(5)
+    ]}
+
+
+def search_response(query):
+    """Build a Bing web search response."""
+    term = query.get("q", [""])[0]
+    return {"webPages": {"value": [
+        {"name": f"{term.title()} - result {i + 1}", "snippet": ARTICLE_TEXT} for i in range(3)
+    ]}}
+
+
+def wikipedia_response(query):
+    """Build a MediaWiki action=query response for a search or a page intro lookup."""
+    if query.get("list") == ["search"]:
+        term = query.get("srsearch", [""])[0]
+        return {"query": {"search": [{"title": f"{term.title()} {i + 1}"} for i in range(3)]}}
+    titles = query.get("titles", [""])[0].split("|")
+    return {"query": {"pages": [{"title": title, "extract": ARTICLE_TEXT} for title in titles]}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer GET requests for the stubbed endpoints with canned JSON."""
+
+    latency = 0.0
+    responses = {
+        "current.json": lambda query: weather_response("current.json", query),
+        "forecast.json": lambda query: weather_response("forecast.json", query),
+        "top-headlines": news_response,
+        "search": search_response,
+        "api.php": wikipedia_response,
+    }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        builder = self.responses.get(url.path.rsplit("/", 1)[-1])
+        if self.latency:
+            time.sleep(self.latency)
+        if builder is None:
+            self.send_error(404)
+            return
+        body = json.dumps(builder(parse_qs(url.query))).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def load_fixtures(path):
+    """Read recorded responses keyed by endpoint name."""
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    unknown = set(fixtures) - set(StubHandler.responses)
+    if unknown:
+        raise ValueError(f"{path}: unknown endpoints {sorted(unknown)}")
+    return fixtures
+
+
+def dump_fixtures(path):
+    """Write the built-in responses for a sample query in fixture format."""
+    query = {"q": ["Hyderabad"], "days": ["3"]}
+    fixtures = {endpoint: builder(query) for endpoint, builder in StubHandler.responses.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=2)
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0, fixtures=None):
+    """Start the stub server on a daemon thread and return (server, base_url).
+
+    fixtures ({endpoint: response}, see load_fixtures) replace the built-in responses.
+    """
+    responses = dict(StubHandler.responses)
+    for endpoint, recorded in (fixtures or {}).items():
+        responses[endpoint] = lambda query, recorded=recorded: recorded
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency, "responses": responses})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=httpd.serve_forever, name="stub-apis", daemon=True).start()
+    return httpd, f"http://{host}:{httpd.server_address[1]}"
+
+
+def stub_environment(base_url):
+    """Return the environment variables that point app.py at the stub server."""
+    return {
+        "WEATHER_API_URL": f"{base_url}/weather/v1",
+        "NEWS_API_URL": f"{base_url}/news/v2",
+        "BING_SEARCH_URL": f"{base_url}/bing/v7.0",
+        "WIKIPEDIA_API_URL": f"{base_url}/w/api.php",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned responses for the external APIs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument("--fixtures", help="JSON file of recorded responses to replay")
+    parser.add_argument("--dump", metavar="FILE", help="write the built-in responses as a fixture file and exit")
+    args = parser.parse_args()
+    if args.dump:
+        dump_fixtures(args.dump)
+        return
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    httpd, base_url = start_stub_server(port=args.port, latency=args.latency, fixtures=fixtures)
+    for name, value in stub_environment(base_url).items():
+        print(f"{name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
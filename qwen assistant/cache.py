@@ -0,0 +1,245 @@
+# Caches for Model Outputs and API Responses
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from storage import LazyDatabase
+
+
+class SummaryCache:
+    """SQLite-backed cache of summaries with TTL expiry and LRU eviction."""
+
+    def __init__(self, path="summary_cache.db", max_entries=5000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = LazyDatabase(path, (
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)",
+        ))
+
+    @staticmethod
+    def make_key(text, model, backend="fp32", **params):
+        """Hash the input text together with the model name, its backend and the generation parameters."""
+        payload = json.dumps({"model": model, "backend": backend, "params": params, "text": text}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return a dict of the cached summaries for the given keys."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, summary, created FROM summaries WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, summary, created in rows:
+                    if now - created <= self.ttl:
+                        found[key] = summary
+            if found:
+                self._conn.executemany("UPDATE summaries SET accessed = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        """Return the cached summary for key, or None."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store (key, summary) pairs and evict entries beyond the size bound."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, summary, created, accessed) VALUES (?, ?, ?, ?)",
+                [(key, summary, now, now) for key, summary in items],
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def put(self, key, summary):
+        """Store a single summary."""
+        self.put_many([(key, summary)])
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones over max_entries."""
+        expired = self._conn.execute("DELETE FROM summaries WHERE created < ?", (now - self.ttl,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY accessed ASC LIMIT ?)", (overflow,)
+            )
+        self.evictions += expired + max(overflow, 0)
+
+    def clear(self):
+        """Remove every cached summary."""
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after ttl seconds."""
+
+    def __init__(self, ttl=3600, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value), oldest access first
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the fresh value for key, or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, loader):
+        """Return the cached value for key, calling loader() to fill it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class StaleWhileRevalidateCache(TTLCache):
+    """TTL cache that keeps serving expired entries while it refreshes them in the background.
+
+    Entries younger than ttl are fresh. Entries up to max_stale old are returned at once and
+    refreshed behind the caller's back. If a fetch fails, whatever is cached is returned
+    instead of the error.
+    """
+
+    def __init__(self, ttl=600, max_stale=6 * 3600, executor=None, max_entries=1024):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.max_stale = max_stale
+        self.executor = executor
+        self.stale_hits = 0
+        self.errors = 0
+        self._refreshing = set()
+
+    def peek(self, key):
+        """Return (value, age_in_seconds) without touching the counters, or (None, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        return entry[1], time.time() - entry[0]
+
+    def fetch(self, key, loader):
+        """Return the value for key, calling loader() when there is nothing usable cached."""
+        value, age = self.peek(key)
+        if value is not None and age <= self.ttl:
+            self.hits += 1
+            return value
+        if value is not None and age <= self.max_stale:
+            self.stale_hits += 1
+            self._refresh(key, loader)
+            return value
+        self.misses += 1
+        try:
+            fresh = loader()
+        except Exception:
+            self.errors += 1
+            if value is not None:
+                return value  # Very old data beats no data while the API is down
+            raise
+        self.set(key, fresh)
+        return fresh
+
+    def _refresh(self, key, loader):
+        """Reload key in the background unless a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, loader())
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Cache Refresh Error ({key}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        if self.executor is not None:
+            self.executor.submit(refresh)
+        else:
+            threading.Thread(target=refresh, daemon=True).start()
+
+    def stats(self):
+        """Return fresh/stale hit and miss counters, errors and the current size."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "entries": len(self._entries),
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
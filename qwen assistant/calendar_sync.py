@@ -0,0 +1,162 @@
+# Local Calendar Event Store
+import bisect
+import datetime
+import logging
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+BATCH_LIMIT = 50  # Google recommends batching at most 50 Calendar calls at a time
+
+
+def event_time(value):
+    """Return an aware datetime for an event's start or end ({"dateTime": ...} or all-day {"date": ...})."""
+    if "dateTime" in value:
+        return datetime.datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    return datetime.datetime.fromisoformat(value["date"]).astimezone()  # All-day: local midnight
+
+
+class CalendarStore:
+    """In-memory copy of a calendar's events, kept current with Calendar syncToken incremental sync.
+
+    The first sync lists the events that end after now minus margin seconds and keeps the
+    nextSyncToken; after that each sync only returns events changed since the previous one
+    (cancelled events arrive with status "cancelled" and are dropped). Events that ended more
+    than margin seconds ago are pruned after every sync, and the rest are kept sorted by
+    start. Queries are answered from memory and trigger a sync only when the store is older
+    than max_age seconds. If the token expires (410 Gone) the store is rebuilt with a full sync.
+    """
+
+    def __init__(self, get_service, calendar_id="primary", lock=None, max_age=60, page_size=250, margin=3600):
+        self.get_service = get_service
+        self.calendar_id = calendar_id
+        self.max_age = max_age
+        self.page_size = page_size
+        self.margin = datetime.timedelta(seconds=margin)
+        self.sync_token = None
+        self.synced_at = 0.0
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.pruned = 0
+        self._events = {}  # id -> event resource
+        self._order = []  # (start, id) of every event, sorted
+        self._api_lock = lock or threading.Lock()  # Shared with other users of the service object
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Apply the changes since the last sync, or list everything on the first call."""
+        with self._lock:
+            cutoff = datetime.datetime.now(datetime.timezone.utc) - self.margin
+            if self.sync_token is not None:
+                try:
+                    self._list(self._apply, sync_token=self.sync_token)
+                    self.incremental_syncs += 1
+                    self._prune(cutoff)
+                    return
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logging.info("Calendar sync token expired, running a full calendar sync")
+            events = {}
+            self._list(lambda event: events.__setitem__(event["id"], event), time_min=cutoff)
+            events = {event_id: event for event_id, event in events.items() if event.get("status") != "cancelled"}
+            self._events = events
+            self._order = sorted((event_time(event["start"]), event_id) for event_id, event in events.items())
+            self.full_syncs += 1
+            self._prune(cutoff)
+
+    def refresh(self):
+        """Sync if the store is older than max_age seconds."""
+        if time.time() - self.synced_at > self.max_age:
+            self.sync()
+
+    def upcoming(self, limit=10, now=None):
+        """Return the next limit events that haven't ended yet, earliest start first."""
+        self.refresh()
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            first = bisect.bisect_left(self._order, (now,))
+            # Events that started before now are the few still running (or ended within margin)
+            events = [self._events[event_id] for _, event_id in self._order[:first]]
+            events = [event for event in events if event_time(event["end"]) > now][:limit]
+            return events + [self._events[event_id] for _, event_id in self._order[first:first + limit - len(events)]]
+
+    def insert(self, event):
+        """Add one event; returns the created event or None."""
+        return self.insert_many([event])[0]
+
+    def insert_many(self, events):
+        """Add events with HTTP batch requests; returns the created events (None where an insert failed)."""
+        service = self.get_service()
+        created = [None] * len(events)
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                logging.error(f"Calendar Insert Error ({request_id}): {exception}")
+                return
+            created[int(request_id)] = response
+
+        for start in range(0, len(events), BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=collect)
+            for index in range(start, min(start + BATCH_LIMIT, len(events))):
+                batch.add(service.events().insert(calendarId=self.calendar_id, body=events[index]),
+                          request_id=str(index))
+            with self._api_lock:
+                batch.execute()
+        with self._lock:
+            for event in created:
+                if event is not None:
+                    self._apply(event)  # Visible now; the next delta sync will just repeat it
+        return created
+
+    def stats(self):
+        """Return the store size and sync counters."""
+        return {"events": len(self._events), "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs, "pruned": self.pruned, "age": time.time() - self.synced_at}
+
+    def _apply(self, event):
+        """Add, move or drop one event, keeping _order sorted (caller holds _lock)."""
+        old = self._events.pop(event["id"], None)
+        if old is not None:
+            key = (event_time(old["start"]), event["id"])
+            index = bisect.bisect_left(self._order, key)
+            if index < len(self._order) and self._order[index] == key:
+                del self._order[index]
+        if event.get("status") != "cancelled":
+            self._events[event["id"]] = event
+            bisect.insort(self._order, (event_time(event["start"]), event["id"]))
+
+    def _prune(self, cutoff):
+        """Drop events that ended before cutoff (caller holds _lock)."""
+        first = bisect.bisect_left(self._order, (cutoff,))
+        kept = []
+        for key in self._order[:first]:  # Only events starting before cutoff can have ended by then
+            if event_time(self._events[key[1]]["end"]) > cutoff:
+                kept.append(key)
+            else:
+                del self._events[key[1]]
+        self.pruned += first - len(kept)
+        self._order[:first] = kept
+
+    def _list(self, apply, sync_token=None, time_min=None):
+        """Page through events.list() and pass each event to apply (caller holds _lock)."""
+        service = self.get_service()
+        page_token = None
+        while True:
+            params = {"calendarId": self.calendar_id, "singleEvents": True, "maxResults": self.page_size}
+            if sync_token:
+                params["syncToken"] = sync_token
+            elif time_min:
+                params["timeMin"] = time_min.isoformat()
+            if page_token:
+                params["pageToken"] = page_token
+            with self._api_lock:
+                response = service.events().list(**params).execute()
+            for event in response.get("items", []):
+                apply(event)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        self.sync_token = response.get("nextSyncToken")
+        self.synced_at = time.time()
@@ -0,0 +1,179 @@
+# Incremental Gmail Sync
+import logging
+import threading
+from email.utils import parseaddr
+
+from googleapiclient.errors import HttpError
+
+from storage import LazyDatabase
+
+METADATA_HEADERS = ["From", "Subject", "Date"]
+HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+BATCH_LIMIT = 100  # Gmail accepts at most 100 calls per batch request
+
+
+def is_unread_inbox(label_ids):
+    """Check whether a message with these labels counts as unread mail in the inbox."""
+    return "INBOX" in label_ids and "UNREAD" in label_ids
+
+
+class MailSync:
+    """Local SQLite cache of unread inbox message metadata, kept current with the Gmail history API.
+
+    The first sync lists every unread message (all pages) and remembers the mailbox historyId.
+    Later syncs ask history().list() for the changes since then, which is usually one small
+    request, and only fetch metadata for messages that are new to the cache. If Gmail has
+    expired the stored historyId the cache is rebuilt with a full sync.
+    """
+
+    def __init__(self, get_service, path="mail_cache.db", lock=None, page_size=500):
+        self.get_service = get_service
+        self.path = path
+        self.page_size = page_size
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self._api_lock = lock or threading.Lock()  # Shared with other users of the service object
+        self._sync_lock = threading.Lock()
+        self._lock = threading.Lock()  # Guards the cache connection
+        self._conn = LazyDatabase(path, (
+            "CREATE TABLE IF NOT EXISTS unread ("
+            "id TEXT PRIMARY KEY, sender TEXT, subject TEXT, date TEXT, snippet TEXT, internal_date INTEGER)",
+            "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)",
+        ))
+
+    @property
+    def history_id(self):
+        """The mailbox historyId the cache is current as of, or None before the first sync."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'history_id'").fetchone()
+        return row[0] if row else None
+
+    def sync(self):
+        """Bring the cache up to date, incrementally when possible."""
+        with self._sync_lock:
+            history_id = self.history_id
+            if history_id is not None:
+                try:
+                    self._incremental_sync(history_id)
+                    return
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                    logging.info("Gmail history expired, running a full mail sync")
+            self._full_sync()
+
+    def unread_count(self):
+        """Return the number of unread inbox messages in the cache."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM unread").fetchone()[0]
+
+    def unread(self, limit=None):
+        """Return cached unread messages as dicts, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, sender, subject, date, snippet FROM unread ORDER BY internal_date DESC LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [dict(zip(("id", "sender", "subject", "date", "snippet"), row)) for row in rows]
+
+    def stats(self):
+        """Return sync counters and the cache size."""
+        return {"unread": self.unread_count(), "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs, "history_id": self.history_id}
+
+    def _full_sync(self):
+        """Rebuild the cache from a listing of every unread inbox message."""
+        service = self.get_service()
+        with self._api_lock:
+            # Read the historyId before listing so changes made during the listing show up in the next delta
+            history_id = service.users().getProfile(userId="me").execute()["historyId"]
+        ids = []
+        page_token = None
+        while True:
+            with self._api_lock:
+                response = service.users().messages().list(
+                    userId="me", labelIds=["INBOX", "UNREAD"], maxResults=self.page_size, pageToken=page_token
+                ).execute()
+            ids.extend(message["id"] for message in response.get("messages", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        known = self._known_ids()
+        self._apply(service, added=[i for i in ids if i not in known], removed=known - set(ids))
+        self._save_history_id(history_id)
+        self.full_syncs += 1
+
+    def _incremental_sync(self, history_id):
+        """Apply the mailbox changes recorded since history_id."""
+        service = self.get_service()
+        unread = {}  # message id -> whether it is unread in the inbox after all the changes
+        page_token = None
+        while True:
+            with self._api_lock:
+                response = service.users().history().list(
+                    userId="me", startHistoryId=history_id, historyTypes=HISTORY_TYPES, pageToken=page_token
+                ).execute()
+            for record in response.get("history", []):
+                for key in ("messagesAdded", "labelsAdded", "labelsRemoved"):
+                    for change in record.get(key, []):
+                        message = change["message"]
+                        unread[message["id"]] = is_unread_inbox(message.get("labelIds", []))
+                for change in record.get("messagesDeleted", []):
+                    unread[change["message"]["id"]] = False
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        known = self._known_ids()
+        self._apply(service, added=[i for i, is_unread in unread.items() if is_unread and i not in known],
+                    removed={i for i, is_unread in unread.items() if not is_unread and i in known})
+        self._save_history_id(response.get("historyId", history_id))
+        self.incremental_syncs += 1
+
+    def _known_ids(self):
+        """Return the ids of every cached message."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM unread")}
+
+    def _apply(self, service, added, removed):
+        """Fetch metadata for added message ids and drop removed ones from the cache."""
+        rows = self._fetch_metadata(service, added)
+        with self._lock:
+            self._conn.executemany("DELETE FROM unread WHERE id = ?", [(i,) for i in removed])
+            self._conn.executemany("INSERT OR REPLACE INTO unread VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def _fetch_metadata(self, service, ids):
+        """Return cache rows for ids, fetching headers in HTTP batch requests."""
+        rows = []
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                if getattr(getattr(exception, "resp", None), "status", None) != 404:  # 404: deleted meanwhile
+                    logging.error(f"Mail Sync Error ({request_id}): {exception}")
+                return
+            if not is_unread_inbox(response.get("labelIds", [])):
+                return  # Read or archived between the listing and this fetch
+            headers = {header["name"]: header["value"] for header in response.get("payload", {}).get("headers", [])}
+            rows.append((response["id"], headers.get("From", ""), headers.get("Subject", ""), headers.get("Date", ""),
+                         response.get("snippet", ""), int(response.get("internalDate", 0))))
+
+        for start in range(0, len(ids), BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=collect)
+            for message_id in ids[start:start + BATCH_LIMIT]:
+                batch.add(service.users().messages().get(userId="me", id=message_id, format="metadata",
+                                                         metadataHeaders=METADATA_HEADERS), request_id=message_id)
+            with self._api_lock:
+                batch.execute()
+        return rows
+
+    def _save_history_id(self, history_id):
+        """Remember how far the cache is synced."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('history_id', ?)", (str(history_id),))
+            self._conn.commit()
+
+
+def sender_name(sender):
+    """Return the display name of a From header, falling back to the address."""
+    name, address = parseaddr(sender)
+    return name or address or "someone"
@@ -0,0 +1,228 @@
+# Sent Message History
+import logging
+import os
+import re
+import threading
+import time
+
+from storage import LazyDatabase, ensure_parent
+
+SEPARATOR = re.compile(r"^-{5,}\s*$")  # pywhatkit ends every entry with a line of dashes
+ENTRY_END = re.compile(rb"-{5,}\r?\n")
+
+
+class SentMessage:
+    """A WhatsApp message or email sent from the assistant."""
+
+    def __init__(self, message_id, channel, contact, message, subject, sent):
+        self.id = message_id
+        self.channel = channel  # "whatsapp" or "email"
+        self.contact = contact  # +digits for WhatsApp, a lowercase address for email
+        self.message = message
+        self.subject = subject
+        self.sent = sent  # Unix timestamp
+
+    def __repr__(self):
+        return (f"SentMessage({self.id}, {self.channel}, {self.contact}, "
+                f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(self.sent))}, {self.message!r})")
+
+
+def normalize_contact(channel, contact):
+    """Return the form contacts are stored in: +digits for phone numbers, lowercase email addresses."""
+    if channel == "whatsapp":
+        return "+" + re.sub(r"\D", "", contact)
+    return contact.strip().lower()
+
+
+def parse_pywhatkit_log(text):
+    """Yield (sent, phone, message) for each complete Date/Time/Phone Number/Message block."""
+    fields = {}
+    message_lines = None
+    for line in text.splitlines():
+        if SEPARATOR.match(line):
+            if message_lines is not None:
+                fields["Message"] = "\n".join(message_lines)
+            try:
+                sent = time.mktime(time.strptime(f"{fields['Date']} {fields['Time']}", "%d/%m/%Y %H:%M"))
+                yield sent, fields["Phone Number"], fields["Message"]
+            except (KeyError, ValueError) as e:
+                logging.error(f"Message Import Error: skipped entry ({e})")
+            fields, message_lines = {}, None
+        elif message_lines is not None:
+            message_lines.append(line)  # Messages can span several lines
+        else:
+            name, _, value = line.partition(":")
+            if name == "Message":
+                message_lines = [value.strip()]
+            elif value:
+                fields[name.strip()] = value.strip()
+
+
+class MessageLog:
+    """Append-only SQLite journal of sent messages, indexed by contact and time.
+
+    Every send adds a row; rows are never updated. A contacts table keeps each contact's most
+    recent message id, so "who did I message last" and "my last message to X" are primary-key
+    lookups however long the history grows. Once the journal passes max_entries by 10% the
+    oldest rows are compacted away, always keeping each contact's latest message.
+    import_pywhatkit() reads pywhatkit's flat log from where the previous import stopped and
+    rotates it to archive_path (path + ".1" by default) once it is bigger than rotate_bytes.
+    """
+
+    def __init__(self, path="messages.db", max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self.compacted = 0
+        self._lock = threading.Lock()
+        self._conn = LazyDatabase(path, (
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, contact TEXT NOT NULL, "
+            "message TEXT NOT NULL, subject TEXT, sent REAL NOT NULL, source TEXT NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS messages_contact ON messages (contact, sent)",
+            "CREATE TABLE IF NOT EXISTS contacts ("
+            "contact TEXT PRIMARY KEY, channel TEXT NOT NULL, last_id INTEGER NOT NULL, last_sent REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS contacts_last_sent ON contacts (last_sent)",
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        ))
+        self._count = None  # Rows in messages, counted on first use
+        self._compact_at = max_entries + max_entries // 10
+
+    def record(self, channel, contact, message, subject=None, sent=None):
+        """Append a sent message and return it."""
+        contact = normalize_contact(channel, contact)
+        sent = time.time() if sent is None else sent
+        with self._lock:
+            sent_message = self._insert(channel, contact, message, subject, sent, "assistant")
+            self._conn.commit()
+            if self._size() > self._compact_at:
+                self._compact()
+        return sent_message
+
+    def last(self, contact=None):
+        """Return the most recent message, or the most recent one to contact; None if there isn't one."""
+        with self._lock:
+            if contact is None:
+                row = self._conn.execute(
+                    "SELECT m.id, m.channel, m.contact, m.message, m.subject, m.sent FROM contacts c "
+                    "JOIN messages m ON m.id = c.last_id ORDER BY c.last_sent DESC LIMIT 1"
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT m.id, m.channel, m.contact, m.message, m.subject, m.sent FROM contacts c "
+                    "JOIN messages m ON m.id = c.last_id WHERE c.contact = ?", (contact,)
+                ).fetchone()
+        return SentMessage(*row) if row else None
+
+    def find_contact(self, spoken):
+        """Return the known contact that spoken refers to: a phone number (full, or its last digits)
+        or an email address (full, or the start of it), preferring the most recently messaged."""
+        digits = re.sub(r"\D", "", spoken)
+        with self._lock:
+            if len(digits) >= 4:
+                row = self._conn.execute("SELECT contact FROM contacts WHERE contact = ?", ("+" + digits,)).fetchone()
+                row = row or self._conn.execute(
+                    "SELECT contact FROM contacts WHERE channel = 'whatsapp' AND contact LIKE ? "
+                    "ORDER BY last_sent DESC LIMIT 1", ("%" + digits,)
+                ).fetchone()
+            else:
+                address = spoken.lower().replace(" at ", "@").replace(" dot ", ".").replace(" ", "")
+                if not address:
+                    return None
+                row = self._conn.execute("SELECT contact FROM contacts WHERE contact = ?", (address,)).fetchone()
+                row = row or self._conn.execute(
+                    "SELECT contact FROM contacts WHERE channel = 'email' AND contact LIKE ? "
+                    "ORDER BY last_sent DESC LIMIT 1", (address + "%",)
+                ).fetchone()
+        return row[0] if row else None
+
+    def import_pywhatkit(self, path="PyWhatKit_DB.txt", rotate_bytes=1024 * 1024, archive_path=None):
+        """Import new entries from pywhatkit's log and return how many were added.
+
+        Entries the assistant already recorded itself (same number and text within two minutes)
+        are skipped. An incomplete entry at the end of the file is left for the next import.
+        """
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'pywhatkit_offset'").fetchone()
+            offset = int(row[0]) if row else 0
+            if os.path.getsize(path) < offset:
+                offset = 0  # The file was replaced or truncated
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            ends = [found.end() for found in ENTRY_END.finditer(data)]
+            if not ends:
+                return 0
+            data = data[:ends[-1]]  # Stop after the last complete entry
+            added = 0
+            for sent, phone, message in parse_pywhatkit_log(data.decode("utf-8", errors="replace")):
+                contact = normalize_contact("whatsapp", phone)
+                duplicate = self._conn.execute(
+                    "SELECT 1 FROM messages WHERE contact = ? AND sent >= ? AND sent < ? AND message = ? LIMIT 1",
+                    (contact, sent - 60, sent + 120, message)
+                ).fetchone()
+                if not duplicate:
+                    self._insert("whatsapp", contact, message, None, sent, "pywhatkit")
+                    added += 1
+            offset += len(data)
+            if offset > rotate_bytes and offset == os.path.getsize(path):
+                archive_path = archive_path or path + ".1"
+                ensure_parent(archive_path)
+                os.replace(path, archive_path)
+                offset = 0
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pywhatkit_offset', ?)", (str(offset),))
+            self._conn.commit()
+            if self._size() > self._compact_at:
+                self._compact()
+        if added:
+            logging.info(f"Imported {added} messages from {path}")
+        return added
+
+    def compact(self):
+        """Drop the oldest messages beyond max_entries now and return how many went."""
+        with self._lock:
+            return self._compact()
+
+    def stats(self):
+        """Return the number of messages, contacts and compacted rows."""
+        with self._lock:
+            contacts = self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+            return {"messages": self._size(), "contacts": contacts, "compacted": self.compacted}
+
+    def _size(self):
+        """Rows in the journal, counted once and then tracked (caller holds _lock)."""
+        if self._count is None:
+            self._count = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return self._count
+
+    def _insert(self, channel, contact, message, subject, sent, source):
+        """Append one row and point the contact at it if it is their newest (caller holds _lock)."""
+        cursor = self._conn.execute(
+            "INSERT INTO messages (channel, contact, message, subject, sent, source) VALUES (?, ?, ?, ?, ?, ?)",
+            (channel, contact, message, subject, sent, source)
+        )
+        self._conn.execute(
+            "INSERT INTO contacts (contact, channel, last_id, last_sent) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (contact) DO UPDATE SET channel = excluded.channel, last_id = excluded.last_id, "
+            "last_sent = excluded.last_sent WHERE excluded.last_sent >= contacts.last_sent",
+            (contact, channel, cursor.lastrowid, sent)
+        )
+        self._count = self._size() + 1
+        return SentMessage(cursor.lastrowid, channel, contact, message, subject, sent)
+
+    def _compact(self):
+        """Delete the oldest rows over max_entries, keeping every contact's latest (caller holds _lock)."""
+        overflow = self._size() - self.max_entries
+        if overflow <= 0:
+            return 0
+        removed = self._conn.execute(
+            "DELETE FROM messages WHERE id IN (SELECT id FROM messages WHERE id NOT IN "
+            "(SELECT last_id FROM contacts) ORDER BY sent ASC LIMIT ?)", (overflow,)
+        ).rowcount
+        self._conn.commit()
+        self._count -= removed
+        self.compacted += removed
+        # Each contact's latest message is kept, so with many contacts the journal can stay over the limit
+        self._compact_at = max(self.max_entries, self._count) + self.max_entries // 10
+        return removed
@@ -0,0 +1,185 @@
+# Lazy Hugging Face Model Registry
+import logging
+import os
+import threading
+import time
+
+# Pipelines used by the assistant: name -> (task, model).
+# Ordered by how soon the assistant is likely to need them, which is also the warm-up order.
+MODEL_SPECS = {
+    "sentiment": ("sentiment-analysis", "distilbert-base-uncased-finetuned-sst-2-english"),
+    "qa": ("question-answering", "distilbert-base-cased-distilled-squad"),
+    "summarization": ("summarization", "facebook/bart-large-cnn"),
+}
+
+
+# Inference backends: "fp32" is the stock PyTorch pipeline, "int8" applies dynamic int8
+# quantization to its Linear layers, "onnx" runs an ONNX Runtime export (needs optimum[onnxruntime]).
+BACKENDS = ("fp32", "int8", "onnx")
+
+# optimum class that loads an ONNX export for each pipeline task
+ORT_MODEL_CLASSES = {
+    "sentiment-analysis": "ORTModelForSequenceClassification",
+    "question-answering": "ORTModelForQuestionAnswering",
+    "summarization": "ORTModelForSeq2SeqLM",
+}
+
+
+class ModelRegistry:
+    """Load Hugging Face pipelines on first use and record how long each load took.
+
+    Each model can run on its own backend (see BACKENDS). Quantized and exported models are
+    cached under artifact_dir so the conversion only happens once. num_threads caps the
+    intra-op threads used by PyTorch and ONNX Runtime.
+    """
+
+    def __init__(self, specs=None, backend="fp32", artifact_dir="model_cache", num_threads=None):
+        self.specs = dict(specs or MODEL_SPECS)
+        self.backend = backend
+        self.backends = {}  # Per-model overrides of backend
+        self.artifact_dir = artifact_dir
+        self.num_threads = num_threads
+        self.load_times = {}
+        self.artifact_hits = {}  # name -> whether its int8/ONNX model came from artifact_dir
+        self._models = {}
+        self._locks = {name: threading.Lock() for name in self.specs}
+        self._warm_thread = None
+
+    def set_backend(self, name, backend):
+        """Choose the backend for one model; takes effect the next time it is loaded."""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backends[name] = backend
+
+    def backend_for(self, name):
+        """Return the backend a model runs on."""
+        return self.backends.get(name, self.backend)
+
+    def get(self, name):
+        """Return the pipeline registered as name, loading it if needed."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self.specs:
+            raise KeyError(f"Unknown model: {name}")
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+                self._models[name] = model
+        return model
+
+    def _load(self, name):
+        """Build the pipeline for name on its backend and time it."""
+        from transformers import pipeline  # Deferred: importing transformers pulls in torch
+        task, model_name = self.specs[name]
+        backend = self.backend_for(name)
+        start = time.perf_counter()
+        if self.num_threads:
+            import torch
+            torch.set_num_threads(self.num_threads)
+        if backend == "onnx":
+            try:
+                model = self._load_onnx(name, task, model_name)
+            except ImportError as e:
+                logging.error(f"ONNX Runtime unavailable for {name}, using fp32: {e}")
+                backend = self.backends[name] = "fp32"  # So caches keyed on the backend stay truthful
+                model = pipeline(task, model=model_name)
+        elif backend == "int8":
+            model = self._load_int8(name, task, model_name)
+        else:
+            model = pipeline(task, model=model_name)
+        elapsed = time.perf_counter() - start
+        self.load_times[name] = elapsed
+        logging.info(f"Loaded {name} model ({model_name}, {backend}) in {elapsed:.2f}s")
+        return model
+
+    def _artifact_path(self, name, backend):
+        """Return where the converted model for name is cached."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        model_name = self.specs[name][1].replace("/", "--")
+        return os.path.join(self.artifact_dir, f"{model_name}-{backend}")
+
+    def _load_int8(self, name, task, model_name):
+        """Build a pipeline on a dynamically quantized model, reusing the cached one if present.
+
+        The whole quantized module is cached, so a cache hit builds the pipeline from it and the
+        tokenizer without ever loading the fp32 weights.
+        """
+        import torch
+        from transformers import AutoTokenizer, pipeline
+        path = self._artifact_path(name, "int8") + ".pt"
+        if os.path.exists(path):
+            try:
+                # weights_only=False: torch 2.1 can't unpickle qint8 tensors otherwise; the file is our own export
+                model = torch.load(path, weights_only=False)
+                self.artifact_hits[name] = True
+                return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+            except Exception as e:
+                logging.error(f"Cached int8 model for {name} unreadable, re-quantizing: {e}")
+        self.artifact_hits[name] = False
+        model = pipeline(task, model=model_name)
+        model.model = quantize_dynamic(model.model)
+        torch.save(model.model, path)
+        return model
+
+    def _load_onnx(self, name, task, model_name):
+        """Build a pipeline on an ONNX Runtime export, exporting the model on first use."""
+        import onnxruntime
+        import optimum.onnxruntime
+        from transformers import AutoTokenizer, pipeline
+        model_class = getattr(optimum.onnxruntime, ORT_MODEL_CLASSES[task])
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        path = self._artifact_path(name, "onnx")
+        if os.path.isdir(path):
+            model = model_class.from_pretrained(path, session_options=options)
+            tokenizer = AutoTokenizer.from_pretrained(path)
+        else:
+            model = model_class.from_pretrained(model_name, export=True, session_options=options)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model.save_pretrained(path)
+            tokenizer.save_pretrained(path)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
+    def is_loaded(self, name):
+        """Check whether a pipeline has already been loaded."""
+        return name in self._models
+
+    def warm_up(self, names=None, background=True):
+        """Load pipelines ahead of time, by default in a daemon thread."""
+        names = list(names or self.specs)
+
+        def warm():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logging.error(f"Model Warm-up Error ({name}): {e}")
+
+        if not background:
+            warm()
+            return None
+        self._warm_thread = threading.Thread(target=warm, name="model-warmup", daemon=True)
+        self._warm_thread.start()
+        return self._warm_thread
+
+    def report(self):
+        """Summarize per-model load times."""
+        lines = []
+        for name in self.specs:
+            if name in self.load_times:
+                lines.append(f"{name}: loaded in {self.load_times[name]:.2f}s ({self.backend_for(name)})")
+            else:
+                lines.append(f"{name}: not loaded")
+        return "\n".join(lines)
+
+
+def quantize_dynamic(model):
+    """Convert a model's Linear layers to dynamic int8 for faster CPU inference."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+registry = ModelRegistry()
@@ -0,0 +1,221 @@
+# Command Pipeline
+import logging
+import queue
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+LISTEN_BACKOFF_MAX_S = 1.0  # Longest pause between listen() calls that keep coming back empty
+ECHO_WORD_OVERLAP = 0.6  # Share of an utterance's words found in what was playing that marks it as our own voice
+
+
+def words_of(text):
+    """Return the lowercase words of text without punctuation."""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def is_echo(text, sentences):
+    """Check whether text is mostly made of words from sentences, i.e. the speakers picked up by the microphone."""
+    words = words_of(text)
+    if not words or not sentences:
+        return False
+    spoken = set(words_of(" ".join(sentences)))
+    return sum(word in spoken for word in words) >= ECHO_WORD_OVERLAP * len(words)
+
+
+class StageMetrics:
+    """Keep recent per-stage latencies and summarize them as percentiles."""
+
+    def __init__(self, window=500):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Record one duration for stage."""
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def summary(self):
+        """Return {stage: {"count", "p50", "p95", "max"}} in seconds."""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+        result = {}
+        for stage, values in samples.items():
+            if values:
+                result[stage] = {
+                    "count": len(values),
+                    "p50": values[len(values) // 2],
+                    "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                    "max": values[-1],
+                }
+        return result
+
+    def report(self):
+        """Format the summary as one line per stage."""
+        return "\n".join(
+            f"{stage}: p50 {stats['p50'] * 1000:.0f}ms, p95 {stats['p95'] * 1000:.0f}ms over {stats['count']} calls"
+            for stage, stats in sorted(self.summary().items())
+        )
+
+
+class CommandPipeline:
+    """Run recognition, NLP, command handlers and speech as separate stages.
+
+    The listener thread keeps recognizing speech while handlers run in a worker pool, so a
+    slow command never blocks the microphone. Saying just a stop word interrupts speech and
+    cancels the running commands; handlers asking a follow-up question receive the next
+    utterance through wait_for_reply().
+
+    listen() returns (text, started_at, ended_at), the speech start and end on the
+    time.perf_counter() clock. Utterances heard during playback that repeat what was being
+    spoken are discarded as echo; anything else said over an answer is run as a command.
+    A reply is only accepted if it started after the question finished playing.
+    """
+
+    def __init__(self, listen, analyze, handle, speech, stop_words=("stop", "cancel"), workers=2):
+        self.listen = listen
+        self.analyze = analyze
+        self.handle = handle
+        self.speech = speech
+        self.stop_words = set(stop_words)
+        self.metrics = StageMetrics()
+        self._utterances = queue.Queue()
+        self._commands = queue.Queue()
+        self._replies = queue.Queue()
+        self._reply_lock = threading.Lock()  # One follow-up dialog at a time
+        self._awaiting_reply = threading.Event()
+        self._reply_since = 0.0  # When the question being answered finished playing
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="handler")
+        self._running = threading.Event()
+        self._active = 0  # Commands currently running in the worker pool
+        self._active_lock = threading.Lock()
+        self._generation = 0  # Bumped on stop so commands started earlier know they were cancelled
+        self._task = threading.local()
+
+    def run(self):
+        """Start all stages and block until stop() is called."""
+        self._running.set()
+        for target, name in ((self._listen_loop, "listener"), (self._dispatch_loop, "dispatcher"),
+                             (self._nlp_loop, "nlp")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+        try:
+            while self._running.is_set():
+                time.sleep(0.2)  # Short sleeps keep Ctrl+C responsive on the main thread
+        except KeyboardInterrupt:
+            self.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logging.info("Pipeline stage latencies:\n" + self.metrics.report())
+
+    def stop(self):
+        """Stop the pipeline after the current utterance."""
+        self._running.clear()
+        self._replies.put("")  # Release a handler waiting for a reply
+
+    def submit(self, command):
+        """Feed a command into the pipeline as if it had been spoken."""
+        self._utterances.put((command, time.perf_counter(), None, None))
+
+    def cancel(self):
+        """Interrupt speech and mark every running command as cancelled."""
+        self._generation += 1
+        self.speech.interrupt()
+        if self._awaiting_reply.is_set():
+            self._replies.put("")
+
+    def is_busy(self):
+        """Check whether a command is running, waiting for a reply or still being spoken."""
+        return self._active > 0 or self._awaiting_reply.is_set() or self.speech.is_speaking()
+
+    def is_cancelled(self):
+        """Check whether the command running on this thread has been cancelled."""
+        generation = getattr(self._task, "generation", None)
+        return generation is not None and generation != self._generation
+
+    def wait_for_reply(self, timeout=30):
+        """Return the next utterance for a handler's follow-up question."""
+        with self._reply_lock:
+            self.speech.wait()  # The question has to finish playing before its answer can start
+            self._reply_since = self.speech.finished_at()
+            self._awaiting_reply.set()
+            try:
+                return self._replies.get(timeout=timeout)
+            except queue.Empty:
+                return ""
+            finally:
+                self._awaiting_reply.clear()
+
+    def _listen_loop(self):
+        """Recognition stage: turn speech into utterances.
+
+        Empty results and errors back off exponentially, so an ended or failing audio stream
+        doesn't turn this loop into a busy spin.
+        """
+        delay = 0.0
+        while self._running.is_set():
+            if delay:
+                time.sleep(delay)
+            start = time.perf_counter()
+            try:
+                text, started, ended = self.listen()
+            except Exception as e:
+                logging.error(f"Recognition Error: {e}")
+                text = ""
+            else:
+                # From speech start when the listener knows it, so waiting for the user doesn't count
+                self.metrics.record("recognition", time.perf_counter() - (started or start))
+            if text:
+                delay = 0.0
+                self._utterances.put((text, time.perf_counter(), started, ended))
+            else:
+                delay = min(LISTEN_BACKOFF_MAX_S, max(0.05, delay * 2))
+
+    def _dispatch_loop(self):
+        """Route utterances: stop words cancel, echo is dropped, replies go to a waiting handler, the rest run."""
+        while self._running.is_set():
+            text, received, started, ended = self._utterances.get()
+            # Only a bare stop word cancels, so "cancel my reminder" or a reply like "cancel the 5pm one" still runs
+            if text.strip().lower() in self.stop_words and self.is_busy():
+                self.cancel()
+            elif started is not None and is_echo(text, self.speech.played_between(started, ended)):
+                logging.info(f"Discarded echo of our own speech: {text}")
+            elif self._awaiting_reply.is_set() and started is not None and started < self._reply_since:
+                logging.info(f"Discarded, started before the question finished: {text}")
+            elif self._awaiting_reply.is_set():
+                self._replies.put(text)
+            else:
+                self.speech.mark_response()
+                with self._active_lock:
+                    self._active += 1
+                self._commands.put((text, received))
+
+    def _nlp_loop(self):
+        """NLP stage: analyze each command, then hand it to the worker pool."""
+        while self._running.is_set():
+            command, received = self._commands.get()
+            start = time.perf_counter()
+            try:
+                self.analyze(command)
+            except Exception as e:
+                logging.error(f"NLP Error: {e}")
+            self.metrics.record("nlp", time.perf_counter() - start)
+            self._executor.submit(self._run_handler, command, received, self._generation)
+
+    def _run_handler(self, command, received, generation):
+        """Handler stage: run one command on a worker thread."""
+        self._task.generation = generation
+        start = time.perf_counter()
+        self.metrics.record("queue", start - received)
+        try:
+            if self.handle(command) is False:
+                self.stop()
+        except Exception as e:
+            logging.error(f"Handler Error: {e}")
+        finally:
+            self._task.generation = None
+            with self._active_lock:
+                self._active -= 1
+            end = time.perf_counter()
+            self.metrics.record("handler", end - start)
+            self.metrics.record("total", end - received)
@@ -0,0 +1,394 @@
+# Streaming Speech Recognition
+import array
+import json
+import logging
+import math
+import queue
+import threading
+import time
+import wave
+from collections import deque
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30  # 30 ms frames: short enough for quick endpointing, long enough for a stable energy estimate
+SAMPLE_WIDTH = 2  # 16-bit mono PCM
+CAPTURE_RETRY_MAX_S = 5.0  # Longest wait between attempts to recover a failing audio source
+
+
+def rms(frame):
+    """Return the root-mean-square amplitude of a 16-bit PCM frame."""
+    samples = array.array("h", frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+# Audio Sources
+
+class MicrophoneSource:
+    """A microphone stream opened once and read frame by frame (needs PyAudio via speech_recognition)."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, device_index=None):
+        import speech_recognition as sr
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self._microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate,
+                                         chunk_size=sample_rate * frame_ms // 1000)
+        self._stream = None
+
+    def read_frame(self):
+        """Return the next frame of audio, opening the device on first use."""
+        if self._stream is None:
+            self._stream = self._microphone.__enter__().stream
+        return self._stream.read(self._microphone.CHUNK)
+
+    def reopen(self):
+        """Close the device so the next read opens it again, e.g. after it was unplugged."""
+        try:
+            self.close()
+        except Exception as e:
+            logging.error(f"Audio Capture Error: {e}")
+            self._stream = None
+
+    def close(self):
+        if self._stream is not None:
+            self._microphone.__exit__(None, None, None)
+            self._stream = None
+
+
+class WavSource:
+    """Frames from a 16-bit mono WAV file, optionally paced in real time like a microphone."""
+
+    def __init__(self, path, frame_ms=FRAME_MS, realtime=False):
+        self._wav = wave.open(path, "rb")
+        if self._wav.getsampwidth() != SAMPLE_WIDTH or self._wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        self.sample_rate = self._wav.getframerate()
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self._samples_per_frame = self.sample_rate * frame_ms // 1000
+
+    def read_frame(self):
+        """Return the next frame, or None at the end of the file."""
+        frame = self._wav.readframes(self._samples_per_frame)
+        if not frame:
+            return None
+        if self.realtime:
+            time.sleep(self.frame_ms / 1000)
+        return frame
+
+    def close(self):
+        self._wav.close()
+
+
+# Voice Activity Detection
+
+class EnergyVAD:
+    """Energy-based voice activity detector with an adaptive noise floor.
+
+    A frame is speech when its RMS is ratio times above the noise floor (and above
+    min_energy). The floor is estimated from the first calibration_ms of audio and keeps
+    tracking slowly during silence, so ambient noise is measured once instead of per utterance.
+    """
+
+    def __init__(self, ratio=3.0, min_energy=200.0, calibration_ms=300, adapt=0.05):
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.calibration_ms = calibration_ms
+        self.adapt = adapt
+        self.noise_floor = None
+        self._calibration = []
+
+    def is_speech(self, frame, frame_ms=FRAME_MS):
+        """Classify one frame."""
+        energy = rms(frame)
+        if self.noise_floor is None:
+            self._calibration.append(energy)
+            if len(self._calibration) * frame_ms >= self.calibration_ms:
+                self.noise_floor = sorted(self._calibration)[len(self._calibration) // 2]
+            return False
+        speech = energy > max(self.noise_floor * self.ratio, self.min_energy)
+        if not speech:
+            self.noise_floor += self.adapt * (energy - self.noise_floor)
+        return speech
+
+
+class WebRtcVAD:
+    """Voice activity detection with the webrtcvad package (10, 20 or 30 ms frames)."""
+
+    def __init__(self, aggressiveness=2, sample_rate=SAMPLE_RATE):
+        import webrtcvad
+        self.sample_rate = sample_rate
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame, frame_ms=FRAME_MS):
+        return self._vad.is_speech(frame, self.sample_rate)
+
+
+# Recognizer Backends
+# Each backend gets an utterance frame by frame: start(), feed(frame) -> partial text or None,
+# finish() -> final text ("" when nothing was understood).
+
+class GoogleRecognizer:
+    """The Google Web Speech API through speech_recognition; transcribes once the utterance ends."""
+
+    streaming = False
+
+    def __init__(self, sample_rate=SAMPLE_RATE, language="en-US"):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+        self.sample_rate = sample_rate
+        self.language = language
+        self._frames = []
+
+    def start(self):
+        self._frames = []
+
+    def feed(self, frame):
+        self._frames.append(frame)
+        return None
+
+    def finish(self):
+        audio = self._sr.AudioData(b"".join(self._frames), self.sample_rate, SAMPLE_WIDTH)
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return ""
+
+
+class VoskRecognizer:
+    """Offline streaming recognition with Vosk; produces partial transcripts while the user speaks."""
+
+    streaming = True
+
+    def __init__(self, model_path, sample_rate=SAMPLE_RATE):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(model_path)
+        self.sample_rate = sample_rate
+        self._recognizer = None
+        self._text = []
+
+    def start(self):
+        self._recognizer = self._vosk.KaldiRecognizer(self._model, self.sample_rate)
+        self._text = []
+
+    def feed(self, frame):
+        if self._recognizer.AcceptWaveform(frame):
+            self._text.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return " ".join(self._text).strip() or None
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(self._text + [partial]).strip() or None
+
+    def finish(self):
+        self._text.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        return " ".join(self._text).strip()
+
+
+class WhisperRecognizer:
+    """Offline Whisper recognition on CPU with faster-whisper (CTranslate2, int8)."""
+
+    streaming = False
+
+    def __init__(self, model="base.en", sample_rate=SAMPLE_RATE, threads=4):
+        from faster_whisper import WhisperModel
+        self._model = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=threads)
+        self.sample_rate = sample_rate
+        self._frames = []
+
+    def start(self):
+        self._frames = []
+
+    def feed(self, frame):
+        self._frames.append(frame)
+        return None
+
+    def finish(self):
+        import numpy as np
+        if self.sample_rate != SAMPLE_RATE:
+            raise ValueError("Whisper expects 16 kHz audio")
+        audio = np.frombuffer(b"".join(self._frames), dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self._model.transcribe(audio, language="en", beam_size=1, vad_filter=False)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+RECOGNIZERS = {"google": GoogleRecognizer, "vosk": VoskRecognizer, "whisper": WhisperRecognizer}
+
+
+def make_recognizer(backend, **options):
+    """Build the recognizer backend named backend ("google", "vosk" or "whisper")."""
+    if backend not in RECOGNIZERS:
+        raise ValueError(f"Unknown recognizer backend: {backend}")
+    return RECOGNIZERS[backend](**options)
+
+
+# Streaming Listener
+
+class StreamingListener:
+    """Turn a continuous audio stream into utterances with VAD and pass them to a recognizer.
+
+    A capture thread reads the source once and for all, so nothing is reopened or recalibrated
+    between turns. listen() waits for speech to start (keeping pre_roll_ms of audio before it),
+    streams each frame to the recognizer, and ends the utterance after silence_ms of silence.
+    on_partial(text) is called with partial transcripts from streaming backends.
+    """
+
+    def __init__(self, source, vad, recognizer, on_partial=None, silence_ms=500, pre_roll_ms=300,
+                 min_speech_ms=120, max_utterance_s=15):
+        self.source = source
+        self.vad = vad
+        self.recognizer = recognizer
+        self.on_partial = on_partial
+        self.frame_ms = getattr(source, "frame_ms", FRAME_MS)
+        self.silence_frames = max(1, silence_ms // self.frame_ms)
+        self.pre_roll_frames = max(1, pre_roll_ms // self.frame_ms)
+        self.start_frames = max(1, min_speech_ms // self.frame_ms)
+        self.max_frames = max_utterance_s * 1000 // self.frame_ms
+        self.last_timings = {}
+        self._frames = queue.Queue(maxsize=max(1, 60000 // self.frame_ms))  # Up to a minute of audio
+        self._thread = None
+        self._ended = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the capture thread if it isn't running yet."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._capture, name="audio-capture", daemon=True)
+                self._thread.start()
+
+    def _capture(self):
+        """Capture loop: read frames from the source, dropping the oldest if nobody is listening.
+
+        Each frame is queued with the time.perf_counter() time it finished arriving, so callers
+        can tell utterances apart from the assistant's own playback. A failing read is retried
+        with exponential backoff, reopening the source if it supports reopen(); None is only
+        queued when the source says the stream has ended or the listener is closed.
+        """
+        delay = 0.05
+        while True:
+            try:
+                frame = None if self._closed else self.source.read_frame()
+            except Exception as e:
+                logging.error(f"Audio Capture Error: {e} (retrying in {delay:.2f}s)")
+                time.sleep(delay)
+                delay = min(CAPTURE_RETRY_MAX_S, delay * 2)
+                if hasattr(self.source, "reopen"):
+                    self.source.reopen()
+                continue
+            delay = 0.05
+            item = None if frame is None else (frame, time.perf_counter())
+            while True:
+                try:
+                    self._frames.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self._frames.get_nowait()
+                    except queue.Empty:
+                        pass
+            if item is None:
+                return
+
+    def drain(self):
+        """Discard audio captured so far, e.g. the assistant's own voice."""
+        try:
+            while True:
+                if self._frames.get_nowait() is None:
+                    self._ended = True
+                    return
+        except queue.Empty:
+            pass
+
+    def listen(self, timeout=None, drain=True):
+        """Return the transcript of the next utterance, or "" on timeout or end of stream.
+
+        Timings of the last utterance (in seconds, audio time unless noted) are kept in
+        last_timings: speech_start, first_partial, speech_end, endpoint (when silence ended the
+        utterance), and recognize (wall time spent in recognizer.finish()). started_at and ended_at
+        give speech start and end on the time.perf_counter() clock.
+        """
+        self.start()
+        if drain:
+            self.drain()
+        if self._ended:
+            return ""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pre_roll = deque(maxlen=self.pre_roll_frames)
+        voiced_run = 0
+        run_started = None  # When the current run of voiced frames began
+        position = 0  # Frames consumed in this call
+        frames = None  # Frames of the utterance once speech started
+        silence = 0
+        self.last_timings = {}
+        while True:
+            wait = None if deadline is None or frames is not None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._frames.get(timeout=wait)
+            except queue.Empty:
+                return ""
+            if item is None:
+                self._ended = True
+                if frames is None:
+                    return ""
+                break
+            frame, arrived = item
+            position += 1
+            speech = self.vad.is_speech(frame, self.frame_ms)
+            if frames is None:
+                pre_roll.append(frame)
+                voiced_run = voiced_run + 1 if speech else 0
+                if voiced_run == 1:
+                    run_started = arrived - self.frame_ms / 1000
+                if voiced_run < self.start_frames:
+                    continue
+                frames = list(pre_roll)
+                self.last_timings["speech_start"] = (position - voiced_run) * self.frame_ms / 1000
+                self.last_timings["started_at"] = run_started
+                self.last_timings["ended_at"] = arrived
+                self.recognizer.start()
+                for buffered in frames:
+                    self._feed(buffered, position)
+                continue
+            frames.append(frame)
+            self._feed(frame, position)
+            if speech:
+                silence = 0
+                self.last_timings["speech_end"] = position * self.frame_ms / 1000
+                self.last_timings["ended_at"] = arrived
+            else:
+                silence += 1
+                if silence >= self.silence_frames:
+                    break
+            if len(frames) >= self.max_frames:
+                break
+        self.last_timings.setdefault("speech_end", position * self.frame_ms / 1000)
+        self.last_timings["endpoint"] = position * self.frame_ms / 1000
+        start = time.perf_counter()
+        text = self.recognizer.finish()
+        self.last_timings["recognize"] = time.perf_counter() - start
+        return text.strip()
+
+    def _feed(self, frame, position):
+        """Pass a frame to the recognizer and report any partial transcript."""
+        partial = self.recognizer.feed(frame)
+        if partial:
+            self.last_timings.setdefault("first_partial", position * self.frame_ms / 1000)
+            if self.on_partial is not None:
+                self.on_partial(partial)
+
+    def close(self):
+        self._closed = True
+        self.source.close()
+
+
+def write_wav(path, pcm, sample_rate=SAMPLE_RATE):
+    """Save 16-bit mono PCM bytes as a WAV file."""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
@@ -0,0 +1,138 @@
+# Persistent Reminder Scheduler
+import heapq
+import logging
+import threading
+import time
+
+from storage import LazyDatabase
+
+
+class Reminder:
+    """A pending reminder."""
+
+    def __init__(self, reminder_id, due, message):
+        self.id = reminder_id
+        self.due = due  # Unix timestamp
+        self.message = message
+
+    def __repr__(self):
+        return f"Reminder({self.id}, {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.due))}, {self.message!r})"
+
+
+class ReminderScheduler:
+    """Fire reminders from a single thread, earliest first, using a heap of due times.
+
+    Reminders are journaled in SQLite, so pending ones survive a restart and are reloaded by
+    start(); ones that came due while the assistant was off fire right away. Delivered and
+    cancelled reminders are deleted from the journal, so it only ever holds pending ones.
+    Adding is O(log n); a cancelled reminder's heap entry is skipped when it surfaces.
+    deliver(reminder) is called on the scheduler thread.
+    """
+
+    def __init__(self, deliver, path="reminders.db"):
+        self.deliver = deliver
+        self.path = path
+        self.delivered = 0
+        self._heap = []  # (due, id)
+        self._pending = {}  # id -> Reminder
+        self._lock = threading.Lock()  # Guards the journal connection
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._conn = LazyDatabase(path, (
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, due REAL NOT NULL, message TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', created REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS reminders_pending ON reminders (status, due)",
+        ))
+
+    def start(self):
+        """Reload pending reminders from the journal and start the scheduler thread."""
+        with self._lock:
+            self._conn.execute("DELETE FROM reminders WHERE status != 'pending'")  # Left by older versions
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id, due, message FROM reminders WHERE status = 'pending'"
+            ).fetchall()
+        with self._wakeup:
+            for reminder_id, due, message in rows:
+                if reminder_id not in self._pending:
+                    self._push(Reminder(reminder_id, due, message))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        logging.info(f"Reminder scheduler started with {len(rows)} pending reminders")
+
+    def add(self, due, message):
+        """Schedule message for the Unix timestamp due and return the reminder."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO reminders (due, message, created) VALUES (?, ?, ?)", (due, message, time.time())
+            )
+            self._conn.commit()
+        reminder = Reminder(cursor.lastrowid, due, message)
+        with self._wakeup:
+            self._push(reminder)
+            if self._heap[0][1] == reminder.id:
+                self._wakeup.notify()  # New earliest reminder: shorten the current wait
+        return reminder
+
+    def cancel(self, reminder_id):
+        """Cancel a pending reminder; returns False if it had already fired or was cancelled."""
+        with self._lock:
+            cancelled = self._conn.execute(
+                "DELETE FROM reminders WHERE id = ? AND status = 'pending'", (reminder_id,)
+            ).rowcount
+            self._conn.commit()
+        with self._wakeup:
+            self._pending.pop(reminder_id, None)
+        return bool(cancelled)
+
+    def list(self):
+        """Return the pending reminders, earliest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, due, message FROM reminders WHERE status = 'pending' ORDER BY due, id"
+            ).fetchall()
+        return [Reminder(*row) for row in rows]
+
+    def stats(self):
+        """Return pending and delivered counts."""
+        with self._wakeup:
+            pending = len(self._pending)
+            heap = len(self._heap)
+        return {"pending": pending, "heap_entries": heap, "delivered": self.delivered}
+
+    def _push(self, reminder):
+        """Add reminder to the heap (caller holds _wakeup)."""
+        self._pending[reminder.id] = reminder
+        heapq.heappush(self._heap, (reminder.due, reminder.id))
+
+    def _next_due(self):
+        """Pop cancelled entries off the heap and return the earliest live one, or None (caller holds _wakeup)."""
+        while self._heap and self._heap[0][1] not in self._pending:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def _run(self):
+        """Scheduler loop: sleep until the earliest reminder is due, then deliver it."""
+        while True:
+            with self._wakeup:
+                head = self._next_due()
+                if head is None:
+                    self._wakeup.wait()
+                    continue
+                delay = head[0] - time.time()
+                if delay > 0:
+                    self._wakeup.wait(timeout=delay)
+                    continue  # Woken early by add() or start(), or the timeout: re-check the head
+                heapq.heappop(self._heap)
+                reminder = self._pending.pop(head[1])
+            with self._lock:
+                self._conn.execute("DELETE FROM reminders WHERE id = ?", (reminder.id,))
+                self._conn.commit()
+            self.delivered += 1
+            try:
+                self.deliver(reminder)
+            except Exception as e:
+                logging.error(f"Reminder Delivery Error: {e}")
@@ -0,0 +1,237 @@
+# Wikipedia Context Retrieval
+# Usage (build an offline index):
+#   python retrieval.py build enwiki-latest-abstract.xml.gz wiki_index.pickle
+# The dump can be a Wikipedia abstract XML file (optionally gzipped) from https://dumps.wikimedia.org/
+# or a JSON Lines file with "title" and "text" fields.
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import pickle
+import re
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+
+import requests
+
+from cache import TTLCache
+from storage import ensure_parent
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+USER_AGENT = "qwen-assistant/1.0 (voice assistant; python-requests)"  # Wikimedia asks every client to identify itself
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which",
+    "who", "why", "with",
+}
+
+
+def tokenize(text):
+    """Lowercase text and split it into index terms."""
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOP_WORDS]
+
+
+class LocalIndex:
+    """BM25 index over Wikipedia abstracts for answering without the network."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.titles = []
+        self.texts = []
+        self.doc_lengths = []
+        self.postings = defaultdict(list)  # term -> [(doc_id, term_frequency)]
+        self.avg_length = 0.0
+
+    def add(self, title, text):
+        """Add one document to the index."""
+        doc_id = len(self.titles)
+        terms = tokenize(f"{title} {text}")
+        self.titles.append(title)
+        self.texts.append(text)
+        self.doc_lengths.append(len(terms))
+        for term, count in Counter(terms).items():
+            self.postings[term].append((doc_id, count))
+
+    def finalize(self):
+        """Compute corpus statistics once all documents are added."""
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        self.postings = dict(self.postings)
+
+    def search(self, query, k=3):
+        """Return up to k (title, text, score) tuples ranked by BM25."""
+        if not self.titles:
+            return []
+        total = len(self.titles)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.titles[doc_id], self.texts[doc_id], score) for doc_id, score in best]
+
+    def save(self, path):
+        """Write the index to disk."""
+        ensure_parent(path)
+        with open(path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        index = cls()
+        with open(path, "rb") as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+    @classmethod
+    def from_dump(cls, path, limit=None):
+        """Build an index from a Wikipedia abstract XML dump or a JSON Lines file."""
+        index = cls()
+        for count, (title, text) in enumerate(read_dump(path)):
+            if limit is not None and count >= limit:
+                break
+            index.add(title, text)
+        index.finalize()
+        return index
+
+
+def read_dump(path):
+    """Yield (title, text) pairs from an abstract dump."""
+    opener = gzip.open if path.endswith(".gz") else open
+    if ".jsonl" in path or ".json" in path:
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["title"], record["text"]
+        return
+    with opener(path, "rb") as f:
+        title = None
+        for event, element in ET.iterparse(f, events=("end",)):
+            if element.tag == "title":
+                title = (element.text or "").removeprefix("Wikipedia: ")
+            elif element.tag == "abstract":
+                text = (element.text or "").strip()
+                if title and text:
+                    yield title, text
+            elif element.tag == "doc":
+                element.clear()
+
+
+class WikipediaRetriever:
+    """Fetch context passages for a question from a local index or Wikipedia, with caching.
+
+    With an executor, the summaries of the top search results are fetched k at a time in
+    parallel; passages still come back in search order. Searches and summaries are MediaWiki
+    API calls made through session, so a pooled, traced session can be passed in.
+    """
+
+    def __init__(self, ttl=24 * 3600, index_path=None, offline=False, min_local_score=5.0, executor=None,
+                 session=None, api_url=WIKIPEDIA_API_URL):
+        self.search_cache = TTLCache(ttl=ttl, max_entries=512)
+        self.summary_cache = TTLCache(ttl=ttl, max_entries=512)
+        self.index_path = index_path
+        self.offline = offline
+        self.min_local_score = min_local_score
+        self.executor = executor
+        self.session = session or requests.Session()
+        self.api_url = api_url
+        self._index = None
+
+    @property
+    def index(self):
+        """The offline index, loaded on first use if index_path exists."""
+        if self._index is None and self.index_path and os.path.exists(self.index_path):
+            self._index = LocalIndex.load(self.index_path)
+            logging.info(f"Loaded local Wikipedia index with {len(self._index.titles)} abstracts")
+        return self._index
+
+    def search(self, query):
+        """Return Wikipedia page titles for query."""
+        return self.search_cache.get_or_set(query.lower().strip(), lambda: [
+            result["title"] for result in self._query(list="search", srsearch=query, srlimit=10, srprop="").get("search", [])
+        ])
+
+    def summary(self, title):
+        """Return the summary of the page called title, or None if it can't be resolved."""
+        return self.summary_cache.get_or_set(title, lambda: self._fetch_summary(title))
+
+    def _fetch_summary(self, title):
+        """Fetch a page summary, following the first links of a disambiguation page."""
+        page = self._page(title)
+        if page is None:
+            return None
+        if "disambiguation" not in page.get("pageprops", {}):
+            return page.get("extract") or None
+        links = self._query(prop="links", titles=page["title"], plnamespace=0, pllimit=3)["pages"][0].get("links", [])
+        for link in links:
+            option = self._page(link["title"])
+            if option is not None and "disambiguation" not in option.get("pageprops", {}) and option.get("extract"):
+                return option["extract"]
+        return None
+
+    def _page(self, title):
+        """Return the page called title (following redirects) with its plain-text intro, or None."""
+        pages = self._query(prop="extracts|pageprops", ppprop="disambiguation", exintro=1, explaintext=1,
+                            redirects=1, titles=title).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            logging.error(f"Wikipedia Page Error: no page called {title!r}")
+            return None
+        return pages[0]
+
+    def _query(self, **params):
+        """Run a MediaWiki action=query request through the session and return its "query" object."""
+        params.update(action="query", format="json", formatversion=2)
+        response = self.session.get(self.api_url, params=params, headers={"User-Agent": USER_AGENT}, timeout=10)
+        response.raise_for_status()
+        return response.json().get("query", {})
+
+    def retrieve(self, question, k=1):
+        """Return up to k (title, text) passages relevant to question."""
+        if self.index is not None:
+            hits = [(title, text) for title, text, score in self.index.search(question, k)
+                    if score >= self.min_local_score]
+            if hits or self.offline:
+                return hits
+        if self.offline:
+            return []
+        titles = self.search(question)
+        passages = []
+        for start in range(0, len(titles), k):  # Most summaries resolve, so the first wave is usually enough
+            wave = titles[start:start + k]
+            texts = self.executor.map(self.summary, wave) if self.executor else map(self.summary, wave)
+            for title, text in zip(wave, texts):
+                if text and len(passages) < k:
+                    passages.append((title, text))
+            if len(passages) >= k:
+                break
+        return passages
+
+    def stats(self):
+        """Return hit/miss counters for both caches."""
+        return {"search": self.search_cache.stats(), "summary": self.summary_cache.stats()}
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] != "build":
+        print("Usage: python retrieval.py build <dump> <index.pickle> [limit]")
+        return 1
+    limit = int(argv[3]) if len(argv) > 3 else None
+    index = LocalIndex.from_dump(argv[1], limit=limit)
+    index.save(argv[2])
+    print(f"Indexed {len(index.titles)} abstracts into {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
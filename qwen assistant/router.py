@@ -0,0 +1,225 @@
+# Intent Router
+import math
+import re
+from collections import Counter, defaultdict, deque
+
+TOKEN = re.compile(r"[a-z0-9']+")
+
+# Slot patterns, applied to the text that follows the matched keyword; group 1 is the value
+CITY = r"\b(?:in|for|at|of)\s+([a-z][a-z .'-]*?)\s*(?:today|tomorrow|now|please)?$"
+SONG = r"^\s*(.+?)\s*(?:on youtube)?$"
+TIME = r"\b(in\s+(?:\d+|an?)\s*(?:minutes?|mins?|hours?|hrs?)\b|\d{1,2}(?::\d{2})?\s*(?:[ap]\.?\s?m\.?)?)"
+REST = r"^\s*(?:the web\s+)?(?:for|about)?\s*(.+?)\s*$"
+
+# Words too common to say anything about the intent
+STOP_WORDS = {
+    "a", "about", "an", "and", "any", "are", "at", "be", "can", "could", "do", "does", "for", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "please", "tell", "the", "there", "this", "to", "what",
+    "what's", "whats", "when", "where", "which", "who", "why", "will", "with", "you",
+}
+
+
+def tokenize(text):
+    """Return (word, start, end) tuples for the words in text."""
+    return [(m.group(), m.start(), m.end()) for m in TOKEN.finditer(text.lower())]
+
+
+class Intent:
+    """A command the router can dispatch to."""
+
+    def __init__(self, name, keywords, handler, priority=0, slots=None, examples=None, order=0):
+        self.name = name
+        self.keywords = list(keywords)
+        self.handler = handler
+        self.priority = priority
+        self.slots = {slot: re.compile(pattern, re.IGNORECASE) for slot, pattern in (slots or {}).items()}
+        self.examples = list(examples or [])
+        self.order = order
+
+
+class Match:
+    """The result of routing an utterance."""
+
+    def __init__(self, intent, text, keyword=None, slots=None, score=1.0):
+        self.intent = intent
+        self.text = text
+        self.keyword = keyword
+        self.slots = slots or {}
+        self.score = score
+
+    def __repr__(self):
+        return f"Match({self.intent.name!r}, keyword={self.keyword!r}, slots={self.slots!r}, score={self.score:.2f})"
+
+
+class _Node:
+    __slots__ = ("children", "fail", "outputs")
+
+    def __init__(self):
+        self.children = {}
+        self.fail = None
+        self.outputs = []  # (intent, keyword, length_in_words)
+
+
+class IntentRouter:
+    """Route utterances to intents with a word-level Aho-Corasick automaton over keywords.
+
+    All keywords are matched in a single pass over the utterance. When several keywords
+    match, the intent with the highest priority wins, then the longest keyword, then the
+    earliest match, then the intent registered first, so routing doesn't depend on the
+    order of an if/elif chain. If no keyword matches, an optional classifier gets a try
+    before the fallback handler.
+    """
+
+    def __init__(self, fallback=None, classifier=None):
+        self.intents = []
+        self.fallback = fallback
+        self.classifier = classifier
+        self._root = None
+
+    def register(self, name, keywords, handler, priority=0, slots=None, examples=None):
+        """Add an intent and invalidate the compiled automaton."""
+        self.intents.append(Intent(name, keywords, handler, priority, slots, examples, order=len(self.intents)))
+        self._root = None
+        return handler
+
+    def intent(self, name, keywords, priority=0, slots=None, examples=None):
+        """Decorator form of register()."""
+        def decorator(handler):
+            return self.register(name, keywords, handler, priority, slots, examples)
+        return decorator
+
+    def compile(self):
+        """Build the keyword automaton (and train the classifier, if any)."""
+        root = _Node()
+        for intent in self.intents:
+            for keyword in intent.keywords:
+                words = [word for word, _, _ in tokenize(keyword)]
+                node = root
+                for word in words:
+                    node = node.children.setdefault(word, _Node())
+                node.outputs.append((intent, keyword, len(words)))
+        root.fail = root
+        pending = deque()
+        for child in root.children.values():
+            child.fail = root
+            pending.append(child)
+        while pending:
+            node = pending.popleft()
+            for word, child in node.children.items():
+                fail = node.fail
+                while fail is not root and word not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children.get(word, root)
+                child.outputs = child.outputs + child.fail.outputs
+                pending.append(child)
+        self._root = root
+        if self.classifier is not None:
+            self.classifier.fit(self.intents)
+        return self
+
+    def find(self, text):
+        """Return every keyword hit as (intent, keyword, start_char, end_char)."""
+        if self._root is None:
+            self.compile()
+        root = self._root
+        node = root
+        tokens = tokenize(text)
+        hits = []
+        for index, (word, _, end) in enumerate(tokens):
+            while node is not root and word not in node.children:
+                node = node.fail
+            node = node.children.get(word, root)
+            for intent, keyword, length in node.outputs:
+                hits.append((intent, keyword, tokens[index - length + 1][1], end))
+        return hits
+
+    def match(self, text):
+        """Return the best Match for text, or None."""
+        hits = self.find(text)
+        if hits:
+            intent, keyword, start, end = min(
+                hits, key=lambda hit: (-hit[0].priority, -(hit[3] - hit[2]), hit[2], hit[0].order)
+            )
+            return Match(intent, text, keyword, self._extract_slots(intent, text[end:]))
+        if self.classifier is not None:
+            prediction = self.classifier.predict(text)
+            if prediction is not None:
+                name, score = prediction
+                intent = next(intent for intent in self.intents if intent.name == name)
+                return Match(intent, text, slots=self._extract_slots(intent, text), score=score)
+        return None
+
+    def dispatch(self, text):
+        """Call the handler of the matching intent (or the fallback) and return its result."""
+        match = self.match(text)
+        if match is None:
+            return self.fallback(text) if self.fallback else None
+        return match.intent.handler(match)
+
+    @staticmethod
+    def _extract_slots(intent, text):
+        """Fill an intent's slots from text (the part of the utterance after the keyword)."""
+        slots = {}
+        for slot, pattern in intent.slots.items():
+            found = pattern.search(text.lower())
+            if found and found.group(1).strip():
+                slots[slot] = found.group(1).strip()
+        return slots
+
+
+class ExampleClassifier:
+    """Lightweight intent classifier: TF-IDF cosine similarity to the intents' example utterances.
+
+    Only used when no keyword matched. It answers only when the closest example is at least
+    min_similarity alike; otherwise routing falls through to the fallback handler
+    (question answering).
+    """
+
+    def __init__(self, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.idf = {}
+        self.unseen_idf = 1.0
+        self.examples = []  # (intent_name, weights, norm)
+        self.index = defaultdict(list)  # word -> positions in self.examples
+
+    @staticmethod
+    def _words(text):
+        return [word for word, _, _ in tokenize(text) if word not in STOP_WORDS]
+
+    def fit(self, intents):
+        """Index the examples registered with each intent."""
+        documents = [(intent.name, Counter(self._words(example))) for intent in intents for example in intent.examples]
+        document_frequency = Counter(word for _, counts in documents for word in counts)
+        total = len(documents)
+        self.idf = {word: math.log((1 + total) / (1 + count)) + 1 for word, count in document_frequency.items()}
+        self.unseen_idf = math.log(1 + total) + 1
+        self.examples = []
+        self.index = defaultdict(list)
+        for name, counts in documents:
+            weights = {word: count * self.idf[word] for word, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            if norm:
+                for word in weights:
+                    self.index[word].append(len(self.examples))
+                self.examples.append((name, weights, norm))
+        return self
+
+    def predict(self, text):
+        """Return (intent_name, similarity) or None."""
+        counts = Counter(self._words(text))
+        if not any(word in self.idf for word in counts):
+            return None
+        # Words never seen in an example still count towards the norm, so they lower the similarity
+        weights = {word: count * self.idf.get(word, self.unseen_idf) for word, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        candidates = {position for word in weights for position in self.index[word]}
+        best_name, best_score = None, 0.0
+        for position in sorted(candidates):
+            name, example, example_norm = self.examples[position]
+            dot = sum(weight * example.get(word, 0.0) for word, weight in weights.items())
+            score = dot / (norm * example_norm)
+            if score > best_score:
+                best_name, best_score = name, score
+        if best_score < self.min_similarity:
+            return None
+        return best_name, best_score
@@ -0,0 +1,196 @@
+# Headless HTTP/WebSocket Server
+# Usage: python server.py [--port 5000] [--allow-personal] [--cors-origin https://example.com]
+# Serves many text clients from one process that loads the models once. HTTP endpoints return
+# the complete response; the WebSocket "command" event streams each part as it is produced.
+# Every request must carry the shared secret from $ASSISTANT_API_TOKEN (one is generated and
+# printed at startup if it isn't set) as "Authorization: Bearer <token>", or as {"token": ...}
+# in the Socket.IO connect auth. The server only listens on loopback; reach it from other
+# machines through a reverse proxy that terminates TLS.
+import argparse
+import hmac
+import logging
+import os
+import secrets
+import sys
+import time
+
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit
+
+import app as assistant
+
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+server = Flask(__name__)
+socketio = SocketIO(server, async_mode="threading")  # Same-origin only unless --cors-origin is given
+API_TOKEN = os.environ.get("ASSISTANT_API_TOKEN") or secrets.token_urlsafe(32)
+ALLOW_PERSONAL = False  # Calendar, mail and message history commands; enabled with --allow-personal
+CORS_ORIGINS = []
+
+
+def bad_request(message):
+    """Return a JSON error response."""
+    return jsonify({"error": message}), 400
+
+
+def text_field(payload, name):
+    """Return payload[name] stripped, or "" when the payload isn't an object or the field isn't a string."""
+    value = payload.get(name) if isinstance(payload, dict) else None
+    return value.strip() if isinstance(value, str) else ""
+
+
+def authorized(token):
+    """Whether token matches the shared secret."""
+    return bool(token) and hmac.compare_digest(token.encode(), API_TOKEN.encode())
+
+
+def bearer_token():
+    """Return the token from the request's Authorization header, or None."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else None
+
+
+@server.before_request
+def require_token():
+    """Reject HTTP requests without the shared secret (CORS preflights carry no credentials)."""
+    if request.method == "OPTIONS":
+        return None
+    if not authorized(bearer_token()):
+        return jsonify({"error": "Missing or invalid token."}), 401
+    return None
+
+
+@server.after_request
+def allow_origin(response):
+    """Let the origins given with --cors-origin read responses; others stay same-origin."""
+    origin = request.headers.get("Origin")
+    if origin and origin in CORS_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
+        response.headers["Vary"] = "Origin"
+    return response
+
+
+@server.get("/api/health")
+def health():
+    """Report that the server is up, which models are loaded and how well requests are batching."""
+    return jsonify({
+        "status": "ok",
+        "models": {name: assistant.registry.is_loaded(name) for name in assistant.registry.specs},
+        "batching": {
+            "qa": assistant.qa_scheduler.stats(),
+            "summarization": assistant.summarization_scheduler.stats(),
+        },
+    })
+
+
+@server.get("/metrics")
+def metrics():
+    """Expose telemetry counters and latency histograms in the Prometheus text format."""
+    return Response(assistant.telemetry.prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@server.post("/api/command")
+def command():
+    """Route a free-text command like the voice assistant would."""
+    text = text_field(request.get_json(silent=True), "command").lower()
+    if not text:
+        return bad_request("Missing or invalid 'command'.")
+    start = time.perf_counter()
+    responses = []
+    assistant.run_text_command(text, responses.append, allow_personal=ALLOW_PERSONAL)
+    return jsonify({"responses": responses, "elapsed": time.perf_counter() - start})
+
+
+@server.post("/api/ask")
+def ask():
+    """Answer a question with the QA model."""
+    question = text_field(request.get_json(silent=True), "question")
+    if not question:
+        return bad_request("Missing or invalid 'question'.")
+    return jsonify({"answer": assistant.ask_model(question)})
+
+
+@server.get("/api/weather")
+def weather():
+    """Return the current weather for ?city=."""
+    city = request.args.get("city", "").strip()
+    if not city:
+        return bad_request("Missing 'city'.")
+    return jsonify({"weather": assistant.get_weather(city)})
+
+
+@server.get("/api/forecast")
+def forecast():
+    """Return the three-day forecast for ?city=."""
+    city = request.args.get("city", "").strip()
+    if not city:
+        return bad_request("Missing 'city'.")
+    return jsonify({"forecast": assistant.get_weather_forecast(city)})
+
+
+@server.get("/api/news")
+def news():
+    """Return the top headlines with summaries."""
+    return jsonify({"news": assistant.get_news()})
+
+
+@server.get("/api/search")
+def search():
+    """Return summarized web results for ?q=."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return bad_request("Missing 'q'.")
+    return jsonify({"results": assistant.web_search(query)})
+
+
+@socketio.on("connect")
+def connect(auth=None):
+    """Refuse Socket.IO connections without the shared secret."""
+    token = (auth or {}).get("token") if isinstance(auth, dict) else None
+    if not authorized(token or bearer_token()):
+        raise ConnectionRefusedError("Missing or invalid token.")
+
+
+@socketio.on("command")
+def stream_command(data):
+    """Run a command and emit each part of the response as soon as it is ready."""
+    text = text_field(data, "command").lower()
+    if not text:
+        emit("error", {"error": "Missing or invalid 'command'."})
+        return
+    start = time.perf_counter()
+    assistant.run_text_command(text, lambda part: emit("partial", {"text": part}), allow_personal=ALLOW_PERSONAL)
+    emit("done", {"elapsed": time.perf_counter() - start})
+
+
+def main():
+    global ALLOW_PERSONAL
+    parser = argparse.ArgumentParser(description="Serve the assistant over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1", help="a loopback address; put a reverse proxy in front")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--allow-personal", action="store_true",
+                        help="answer calendar, email and message history commands for text clients")
+    parser.add_argument("--cors-origin", action="append", default=[], metavar="ORIGIN",
+                        help="a browser origin allowed to call the server (repeatable)")
+    parser.add_argument("--no-warm-up", action="store_true", help="load models on first request instead")
+    args = parser.parse_args()
+    if args.host not in LOOPBACK_HOSTS:
+        # The Werkzeug development server has no TLS and isn't hardened for direct exposure
+        parser.error(f"--host must be a loopback address ({', '.join(sorted(LOOPBACK_HOSTS))}); "
+                     f"use a reverse proxy to serve other machines")
+    ALLOW_PERSONAL = args.allow_personal
+    CORS_ORIGINS.extend(args.cors_origin)
+    if args.cors_origin:
+        socketio.init_app(server, async_mode="threading", cors_allowed_origins=args.cors_origin)
+    if not os.environ.get("ASSISTANT_API_TOKEN"):
+        print(f"ASSISTANT_API_TOKEN is not set; clients must send this token: {API_TOKEN}", file=sys.stderr)
+    if not args.no_warm_up:
+        assistant.registry.warm_up(background=True)
+    logging.info(f"Assistant server listening on {args.host}:{args.port} (personal commands "
+                 f"{'on' if ALLOW_PERSONAL else 'off'})")
+    socketio.run(server, host=args.host, port=args.port, allow_unsafe_werkzeug=True)
+
+
+if __name__ == "__main__":
+    main()
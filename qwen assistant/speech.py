@@ -0,0 +1,175 @@
+# Speech Output Queue
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text):
+    """Split text into sentences so playback can start before the whole text is spoken."""
+    return [sentence.strip() for sentence in SENTENCE_BREAK.split(text) if sentence.strip()]
+
+
+class SpeechQueue:
+    """Speak queued text sentence by sentence on a worker thread that owns the TTS engine."""
+
+    def __init__(self, engine_factory):
+        self._engine_factory = engine_factory
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+        self._generation = 0  # Bumped by interrupt() so queued sentences from before it are dropped
+        self._engine = None
+        self._thread = None
+        self.error = None  # Why the engine last failed to start, if it did
+        self._response_start = None
+        self._played = deque(maxlen=50)  # (start, end, sentence) on the time.perf_counter() clock
+        self._playing = None  # (start, sentence) of the sentence being spoken
+        self.first_audio_latencies = deque(maxlen=1000)
+
+    def start(self):
+        """Start the worker thread if it isn't running yet."""
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        """Start the worker thread; the caller holds self._lock."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+            self._thread.start()
+
+    def mark_response(self):
+        """Mark the start of a response; the next sentence spoken records time-to-first-audio."""
+        with self._lock:
+            self._response_start = time.perf_counter()
+
+    def say(self, text):
+        """Queue text for speaking and return immediately."""
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        with self._lock:
+            # Queue under the lock so a worker that fails to start can't miss these sentences
+            self._start_locked()
+            if self._response_start is None and self._pending == 0:
+                self._response_start = time.perf_counter()
+            self._pending += len(sentences)
+            self._idle.clear()
+            for sentence in sentences:
+                self._queue.put((self._generation, sentence))
+
+    def wait(self, timeout=None):
+        """Block until everything queued so far has been spoken."""
+        return self._idle.wait(timeout)
+
+    def is_speaking(self):
+        """Check whether any sentences are still queued or playing."""
+        return not self._idle.is_set()
+
+    def played_between(self, start, end):
+        """Return the sentences whose playback overlapped start..end (time.perf_counter() clock)."""
+        with self._lock:
+            spans = list(self._played)
+            if self._playing is not None:
+                spans.append((self._playing[0], float("inf"), self._playing[1]))
+        return [sentence for began, finished, sentence in spans if began <= end and finished >= start]
+
+    def finished_at(self):
+        """Return when the last sentence finished playing (time.perf_counter() clock), 0.0 if none has."""
+        with self._lock:
+            return self._played[-1][1] if self._played else 0.0
+
+    def interrupt(self):
+        """Stop the current sentence and drop everything still queued (barge-in)."""
+        with self._lock:
+            self._generation += 1
+            self._response_start = None
+        try:
+            while True:
+                self._queue.get_nowait()
+                self._finish_item()
+        except queue.Empty:
+            pass
+        if self._engine is not None:
+            try:
+                self._engine.stop()
+            except Exception as e:
+                logging.error(f"Speech Interrupt Error: {e}")
+
+    def stats(self):
+        """Return time-to-first-audio figures in seconds."""
+        latencies = self.first_audio_latencies
+        return {
+            "responses": len(latencies),
+            "last": latencies[-1] if latencies else None,
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+        }
+
+    def _finish_item(self):
+        """Account for one sentence leaving the queue."""
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._pending = 0
+                self._idle.set()
+
+    def _abandon(self, error):
+        """Drop everything queued after the engine failed so wait() returns; the next say() retries."""
+        with self._lock:
+            self.error = error
+            self._thread = None
+            self._response_start = None
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._pending = 0
+            self._idle.set()
+
+    def _run(self):
+        """Worker loop: create the engine on this thread and speak sentences in order."""
+        try:
+            import comtypes  # SAPI5 on Windows needs COM initialized on the thread that uses it
+            comtypes.CoInitialize()
+        except ImportError:
+            pass
+        try:
+            self._engine = self._engine_factory()
+        except Exception as e:
+            logging.error(f"Speech Engine Error: {e}")
+            self._abandon(e)
+            return
+        self.error = None
+        while True:
+            generation, sentence = self._queue.get()
+            try:
+                with self._lock:
+                    stale = generation != self._generation
+                    start = None
+                    if not stale:
+                        start, self._response_start = self._response_start, None
+                if stale:
+                    continue
+                if start is not None:
+                    latency = time.perf_counter() - start
+                    self.first_audio_latencies.append(latency)
+                    logging.info(f"Time to first audio: {latency:.2f}s")
+                with self._lock:
+                    self._playing = (time.perf_counter(), sentence)
+                self._engine.say(sentence)
+                self._engine.runAndWait()
+            except Exception as e:
+                logging.error(f"Speech Error: {e}")
+            finally:
+                with self._lock:
+                    if self._playing is not None:
+                        self._played.append((self._playing[0], time.perf_counter(), self._playing[1]))
+                        self._playing = None
+                self._finish_item()
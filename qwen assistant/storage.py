@@ -0,0 +1,58 @@
+# Local Data Storage
+# Caches, journals, telemetry and model artifacts live under one directory: $ASSISTANT_DATA_DIR,
+# or data/ next to this file. Nothing is created there until it is first written, so importing
+# app.py leaves the working directory alone.
+import os
+import sqlite3
+import threading
+
+DATA_DIR = os.environ.get("ASSISTANT_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_path(name):
+    """Return the path of name inside the data directory."""
+    return os.path.join(DATA_DIR, name)
+
+
+def ensure_parent(path):
+    """Create the directory path will be written to, if it doesn't exist yet."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+class LazyDatabase:
+    """A SQLite connection opened on first use, creating its directory and running schema then.
+
+    Offers the execute/executemany/commit subset of sqlite3.Connection the stores use; callers
+    still serialize access with their own locks.
+    """
+
+    def __init__(self, path, schema=()):
+        self.path = path
+        self.schema = schema
+        self._conn = None
+        self._open_lock = threading.Lock()
+
+    def connection(self):
+        """Return the connection, opening it and creating the tables the first time."""
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    ensure_parent(self.path)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    for statement in self.schema:
+                        conn.execute(statement)
+                    conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    def execute(self, *args):
+        return self.connection().execute(*args)
+
+    def executemany(self, *args):
+        return self.connection().executemany(*args)
+
+    def commit(self):
+        self.connection().commit()
@@ -0,0 +1,260 @@
+# Performance Telemetry
+# Usage: python telemetry.py report [data/telemetry.jsonl] [--stage NAME]
+# Spans are appended to a JSONL file, one object per finished span, and aggregated in memory
+# as Prometheus-style counters and histograms.
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from storage import data_path, ensure_parent
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Span:
+    """One timed operation; attributes added with set() are exported with it."""
+
+    def __init__(self, name, span_id, parent, trace, attrs):
+        self.name = name
+        self.id = span_id
+        self.parent = parent
+        self.trace = trace
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = None
+        self.status = "ok"
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        """Add attributes such as cache results or payload sizes."""
+        self.attrs.update(attrs)
+        return self
+
+    def started_at(self, started):
+        """Time the span from started (time.perf_counter() clock) instead of from entering the block."""
+        self.start += started - self._started
+        self._started = started
+        return self
+
+    def to_dict(self):
+        record = {"ts": round(self.start, 6), "span": self.name, "duration": round(self.duration, 6),
+                  "status": self.status, "id": self.id, "trace": self.trace}
+        if self.parent is not None:
+            record["parent"] = self.parent
+        record.update(self.attrs)
+        return record
+
+
+class Telemetry:
+    """Record spans with durations and attributes, export them as JSONL and Prometheus text.
+
+    Spans opened inside another span on the same thread become its children and share its
+    trace id, so everything one command did can be grouped together. The JSONL file is
+    rotated to path + ".1" once it grows beyond max_bytes.
+    """
+
+    def __init__(self, path="telemetry.jsonl", enabled=True, max_bytes=20 * 1024 * 1024):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+        self._counters = defaultdict(float)  # (name, labels) -> value
+        self._histograms = {}  # span name -> [bucket counts..., +Inf count, sum]
+
+    def span(self, name, **attrs):
+        """Context manager timing a block: with telemetry.span("http", host=...) as span: ..."""
+        return _SpanContext(self, name, attrs)
+
+    def _open(self, name, attrs):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        span_id = next(self._ids)
+        span = Span(name, span_id, parent.id if parent else None, parent.trace if parent else span_id, attrs)
+        stack.append(span)
+        return span
+
+    def _close(self, span, error):
+        span.duration = time.perf_counter() - span._started
+        if error is not None:
+            span.status = "error"
+            span.attrs.setdefault("error", type(error).__name__)
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self._observe(span)
+            if self.path:
+                self._write(json.dumps(span.to_dict(), default=str))
+
+    def _observe(self, span):
+        """Update the span counters and duration histogram (caller holds _lock)."""
+        self._counters[("spans_total", (("span", span.name), ("status", span.status)))] += 1
+        if "bytes" in span.attrs:
+            self._counters[("payload_bytes_total", (("span", span.name),))] += span.attrs["bytes"] or 0
+        if "cache" in span.attrs:
+            self._counters[("cache_lookups_total", (("result", span.attrs["cache"]), ("span", span.name)))] += 1
+        histogram = self._histograms.setdefault(span.name, [0] * (len(BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(BUCKETS):
+            if span.duration <= bound:
+                histogram[i] += 1
+        histogram[len(BUCKETS)] += 1
+        histogram[-1] += span.duration
+
+    def _write(self, line):
+        """Append one JSON line, rotating the file when it gets too big (caller holds _lock)."""
+        try:
+            if self._file is None:
+                ensure_parent(self.path)
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line + "\n")
+            if self.max_bytes and self._file.tell() > self.max_bytes:
+                self._file.close()
+                os.replace(self.path, self.path + ".1")
+                self._file = None
+        except OSError as e:
+            logging.error(f"Telemetry Error: {e}")
+            self.path = None  # Keep the in-memory metrics; stop trying to write
+
+    def prometheus(self):
+        """Render counters and span duration histograms in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = {name: list(values) for name, values in self._histograms.items()}
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"assistant_{name}"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        if histograms:
+            lines.append("# TYPE assistant_span_duration_seconds histogram")
+        for name, values in sorted(histograms.items()):
+            bounds = [f"{bound:g}" for bound in BUCKETS] + ["+Inf"]
+            for bound, bucket in zip(bounds, values):
+                lines.append(f'assistant_span_duration_seconds_bucket{_labels((("span", name), ("le", bound)))} {bucket}')
+            lines.append(f'assistant_span_duration_seconds_sum{_labels((("span", name),))} {values[-1]:.6f}')
+            lines.append(f'assistant_span_duration_seconds_count{_labels((("span", name),))} {values[len(BUCKETS)]}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _SpanContext:
+    def __init__(self, telemetry, name, attrs):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self):
+        if not self.telemetry.enabled:
+            self.span = Span(self.name, 0, None, 0, self.attrs)  # Accepts set() calls, never recorded
+            return self.span
+        self.span = self.telemetry._open(self.name, self.attrs)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.telemetry.enabled:
+            self.telemetry._close(self.span, exc)
+        return False
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{key}="{str(value)}"' for key, value in labels) + "}" if labels else ""
+
+
+# Report
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def read_spans(paths):
+    """Yield span records from JSONL files, skipping lines that don't parse."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(records, group_by=("span",)):
+    """Return {group: {"count", "errors", "p50", "p95", "p99", "max", "bytes"}} from span records."""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    payload = defaultdict(int)
+    for record in records:
+        key = " ".join(str(record[field]) for field in group_by if field in record) or "-"
+        durations[key].append(record["duration"])
+        errors[key] += record.get("status") == "error"
+        payload[key] += record.get("bytes") or 0
+    result = {}
+    for key, values in durations.items():
+        values.sort()
+        result[key] = {"count": len(values), "errors": errors[key], "p50": percentile(values, 0.5),
+                       "p95": percentile(values, 0.95), "p99": percentile(values, 0.99), "max": values[-1],
+                       "bytes": payload[key]}
+    return result
+
+
+def format_table(summary, title):
+    lines = [f"{title:<32} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'KiB':>8}"]
+    for key, stats in sorted(summary.items(), key=lambda item: -item[1]["p50"] * item[1]["count"]):
+        lines.append(f"{key:<32} {stats['count']:>7} {stats['errors']:>5} {stats['p50'] * 1000:>9.1f} "
+                     f"{stats['p95'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f} "
+                     f"{stats['bytes'] / 1024:>8.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize assistant telemetry.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="p50/p95/p99 per stage from JSONL span logs")
+    report.add_argument("paths", nargs="*", default=[data_path("telemetry.jsonl")])
+    report.add_argument("--stage", help="only spans with this name, broken down by intent/model/host/cache")
+    args = parser.parse_args()
+
+    records = list(read_spans(args.paths))
+    if not records:
+        parser.exit(1, "No spans found.\n")
+    if args.stage:
+        selected = [record for record in records if record["span"] == args.stage]
+        print(format_table(summarize(selected, ("span", "intent", "model", "host", "cache")), args.stage))
+        return
+    print(format_table(summarize(records), "stage"))
+    commands = [record for record in records if record["span"] == "command"]
+    if commands:
+        print()
+        print(format_table(summarize(commands, ("intent",)), "command by intent"))
+    cached = [record for record in records if "cache" in record]
+    if cached:
+        print()
+        hits = defaultdict(lambda: [0, 0])
+        for record in cached:
+            hits[record["span"]][0] += record["cache"] == "hit"
+            hits[record["span"]][1] += 1
+        for span, (hit, total) in sorted(hits.items()):
+            print(f"{span}: cache hit rate {hit / total:.0%} over {total} lookups")
+
+
+if __name__ == "__main__":
+    main()